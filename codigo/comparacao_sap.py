@@ -0,0 +1,259 @@
+"""
+Comparação lado a lado de várias máquinas SAP-1.
+
+Cada programa (por exemplo, o do aluno e a solução de referência) roda numa
+instância própria do emulador sem janela (HeadlessEmulator com NullCanvas),
+com seu próprio estado de CPU. Todas avançam juntas, uma instrução por vez,
+sob um único agendador (after) da janela, e todos os painéis ficam num só
+canvas: a cada passo só os textos e cores que mudaram são reconfigurados, e
+o Tk redesenha tudo de uma vez quando volta ao laço principal. Registradores,
+células de memória e saídas que diferem entre as máquinas são destacados.
+"""
+
+import io
+import tkinter as tk
+from tkinter import ttk
+
+from dispositivos_sap import InputPort, read_values
+from montador_sap import MEMORY_SIZE
+from offscreen_sap import HeadlessEmulator, NullCanvas
+
+# Registradores exibidos em cada painel: (chave em cpu ou flag, rótulo, dígitos hexadecimais).
+REGISTERS = (("PC", "PC", 1), ("MAR", "MAR", 1), ("IR", "IR", 2), ("ACC", "ACC", 2),
+             ("B", "B", 2), ("output", "OUT", 2), ("input", "IN", 2), ("Z", "Z", 1), ("C", "C", 1))
+FLAGS = ("Z", "C")
+
+DIVERGENT_COLOR = "#ffb3b3"
+NORMAL_COLOR = "white"
+PC_COLOR = "#ffff99"
+
+
+def register_value(cpu, name):
+    """Valor de uma linha de REGISTERS: as flags ficam em cpu['flags']."""
+    return cpu['flags'][name] if name in FLAGS else cpu[name]
+
+
+def parse_inputs(text):
+    """Valores da Porta de Entrada digitados como '5, 0x10 7'. Texto vazio = sem porta."""
+    if not text.strip():
+        return None
+    return list(read_values(io.BytesIO(text.encode())))
+
+
+class Machine:
+    """Uma instância do SAP-1 na comparação: emulador sem janela e sem pausas."""
+
+    def __init__(self, name, source, inputs=None, isa=None):
+        self.name = name
+        port = InputPort(iter(inputs)) if inputs is not None else None
+        self.emulator = HeadlessEmulator(source, canvas=NullCanvas(), input_port=port, isa=isa)
+        self.steps = 0
+        self.error = None
+        if not self.emulator.assemble():
+            self.error = self.emulator.errors[-1]
+        self.running = self.error is None
+
+    @property
+    def cpu(self):
+        return self.emulator.cpu
+
+    @property
+    def status(self):
+        return self.error or self.emulator.status_var.get()
+
+    def outputs(self):
+        return self.emulator.output_history.values()
+
+    def step(self):
+        """Executa uma instrução com o step() de referência (para também em laço infinito)."""
+        if not self.running:
+            return
+        self.steps += 1
+        if self.emulator.detect_loop() or not self.emulator.step():
+            self.running = False
+            self.emulator.flush_output_devices()
+
+
+class ComparisonSession:
+    """Conjunto de máquinas que avançam em lockstep."""
+
+    def __init__(self, sources, inputs=None, isa=None):
+        self.machines = [Machine(name, source, inputs, isa) for name, source in sources]
+
+    @property
+    def finished(self):
+        return not any(machine.running for machine in self.machines)
+
+    def step(self):
+        """Avança todas as máquinas uma instrução. Retorna as divergências."""
+        for machine in self.machines:
+            machine.step()
+        return self.divergences()
+
+    def divergences(self):
+        """
+        Conjunto de chaves que diferem entre as máquinas montadas:
+        ("reg", nome) (inclusive as flags Z e C), ("mem", endereço) e ("outputs",).
+        """
+        machines = [machine for machine in self.machines if machine.error is None]
+        if len(machines) < 2:
+            return set()
+        diverged = set()
+        for name, _, _ in REGISTERS:
+            if len({register_value(machine.cpu, name) for machine in machines}) > 1:
+                diverged.add(("reg", name))
+        for addr in range(MEMORY_SIZE):
+            if len({machine.cpu['memory'][addr] for machine in machines}) > 1:
+                diverged.add(("mem", addr))
+        if len({tuple(machine.outputs()) for machine in machines}) > 1:
+            diverged.add(("outputs",))
+        return diverged
+
+
+class ComparisonWindow(tk.Toplevel):
+    """Janela com um painel compacto por máquina, todos no mesmo canvas."""
+
+    PANEL_WIDTH = 240
+    PANEL_HEIGHT = 420
+    CELL = 52
+
+    def __init__(self, parent, sources, isa=None):
+        super().__init__(parent)
+        self.title("Comparação de Máquinas SAP-1")
+        self.sources = sources
+        self.isa = isa
+        self.session = None
+        self._job = None
+        self._items = {}    # (máquina, chave) -> (retângulo ou None, texto)
+        self._shown = {}    # id do item -> valor exibido, para só reconfigurar o que mudou
+
+        controls = ttk.Frame(self, padding="5")
+        controls.pack(fill=tk.X)
+        ttk.Button(controls, text="Passo", command=self.step).pack(side=tk.LEFT, padx=2)
+        self.run_button = ttk.Button(controls, text="Executar", command=self.toggle_run)
+        self.run_button.pack(side=tk.LEFT, padx=2)
+        ttk.Button(controls, text="Reiniciar", command=self.reset).pack(side=tk.LEFT, padx=2)
+        ttk.Label(controls, text="Entradas:").pack(side=tk.LEFT, padx=(10, 2))
+        self.inputs_var = tk.StringVar(value="")
+        ttk.Entry(controls, textvariable=self.inputs_var, width=18).pack(side=tk.LEFT)
+        ttk.Label(controls, text="Instruções/s:").pack(side=tk.LEFT, padx=(10, 2))
+        self.speed = ttk.Scale(controls, from_=1, to=50, value=4, orient=tk.HORIZONTAL, length=120)
+        self.speed.pack(side=tk.LEFT)
+
+        self.canvas = tk.Canvas(self, width=self.PANEL_WIDTH * len(sources), height=self.PANEL_HEIGHT,
+                                bg="#f0f0f0", relief="sunken", borderwidth=2)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.summary_var = tk.StringVar(value="")
+        ttk.Label(self, textvariable=self.summary_var, relief=tk.SUNKEN, padding="5",
+                  font=('Arial', 10)).pack(fill=tk.X, side=tk.BOTTOM)
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.reset()
+
+    def reset(self):
+        """Remonta todos os programas e volta ao início."""
+        self.stop()
+        try:
+            inputs = parse_inputs(self.inputs_var.get())
+        except ValueError as e:
+            self.summary_var.set(f"Entradas inválidas ({e}): use números de 0 a 255, decimais ou 0x.., "
+                                 "separados por vírgula.")
+            return
+        self.session = ComparisonSession(self.sources, inputs, self.isa)
+        self._draw_panels()
+        self._repaint(self.session.divergences())
+
+    def step(self):
+        if not self.session.finished:
+            self._repaint(self.session.step())
+
+    def toggle_run(self):
+        if self._job is None:
+            self.run_button.config(text="Pausar")
+            self._tick()
+        else:
+            self.stop()
+
+    def stop(self):
+        if self._job is not None:
+            self.after_cancel(self._job)
+            self._job = None
+        self.run_button.config(text="Executar")
+
+    def close(self):
+        self.stop()
+        self.destroy()
+
+    def _tick(self):
+        """Único agendador da janela: um passo de todas as máquinas e um redesenho."""
+        self._repaint(self.session.step())
+        if self.session.finished:
+            self._job = None
+            self.run_button.config(text="Executar")
+            return
+        self._job = self.after(int(1000 / float(self.speed.get())), self._tick)
+
+    def _draw_panels(self):
+        self.canvas.delete("all")
+        self._items.clear()
+        self._shown.clear()
+        for index, machine in enumerate(self.session.machines):
+            x = index * self.PANEL_WIDTH + 10
+            self.canvas.create_text(x, 14, anchor='w', text=machine.name, font=('Arial', 11, 'bold'))
+            for row, (name, label, _) in enumerate(REGISTERS):
+                y = 36 + row * 22
+                self.canvas.create_text(x, y + 9, anchor='w', text=label, font=('Arial', 9, 'bold'))
+                rect = self.canvas.create_rectangle(x + 40, y, x + 100, y + 18, fill=NORMAL_COLOR, outline="#999999")
+                text = self.canvas.create_text(x + 70, y + 9, text="", font=('Courier', 10))
+                self._items[index, ("reg", name)] = (rect, text)
+            for addr in range(MEMORY_SIZE):
+                cx = x + (addr % 4) * self.CELL
+                cy = 240 + (addr // 4) * 26
+                rect = self.canvas.create_rectangle(cx, cy, cx + self.CELL - 4, cy + 22,
+                                                    fill=NORMAL_COLOR, outline="#999999")
+                self.canvas.create_text(cx + 3, cy + 11, anchor='w', text=f"{addr:X}",
+                                        font=('Arial', 7), fill="gray")
+                text = self.canvas.create_text(cx + 30, cy + 11, text="", font=('Courier', 10))
+                self._items[index, ("mem", addr)] = (rect, text)
+            self._items[index, ("outputs",)] = (None, self.canvas.create_text(
+                x, 355, anchor='w', text="", font=('Courier', 9), width=self.PANEL_WIDTH - 20))
+            self._items[index, ("status",)] = (None, self.canvas.create_text(
+                x, 390, anchor='w', text="", font=('Arial', 8), width=self.PANEL_WIDTH - 20))
+
+    def _set(self, item, **options):
+        """Reconfigura um item do canvas só se algo mudou desde o último redesenho."""
+        key = tuple(sorted(options.items()))
+        if self._shown.get(item) != key:
+            self._shown[item] = key
+            self.canvas.itemconfig(item, **options)
+
+    def _repaint(self, diverged):
+        for index, machine in enumerate(self.session.machines):
+            cpu = machine.cpu
+            for name, _, digits in REGISTERS:
+                rect, text = self._items[index, ("reg", name)]
+                self._set(text, text=f"{register_value(cpu, name):0{digits}X}")
+                self._set(rect, fill=DIVERGENT_COLOR if ("reg", name) in diverged else NORMAL_COLOR)
+            for addr in range(MEMORY_SIZE):
+                rect, text = self._items[index, ("mem", addr)]
+                self._set(text, text=f"{cpu['memory'][addr]:02X}")
+                if ("mem", addr) in diverged:
+                    fill = DIVERGENT_COLOR
+                elif addr == cpu['PC'] and machine.running:
+                    fill = PC_COLOR
+                else:
+                    fill = NORMAL_COLOR
+                self._set(rect, fill=fill)
+            outputs = machine.outputs()[-8:]
+            self._set(self._items[index, ("outputs",)][1],
+                      text="Saída: " + " ".join(f"{value:02X}" for value in outputs),
+                      fill="red" if ("outputs",) in diverged else "black")
+            self._set(self._items[index, ("status",)][1],
+                      text=f"{machine.steps} instr. | {machine.status}")
+
+        if self.session.finished:
+            state = "todas paradas"
+        else:
+            state = f"{sum(machine.running for machine in self.session.machines)} em execução"
+        detail = f"{len(diverged)} diferença(s)" if diverged else "sem diferenças"
+        self.summary_var.set(f"{len(self.session.machines)} máquinas, {state}, {detail}")
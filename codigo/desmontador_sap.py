@@ -0,0 +1,162 @@
+"""
+Desmontador (Disassembler) e painel de desmontagem ao vivo do SAP-1.
+
+Cada célula da memória é mostrada como endereço, byte, instrução e linha do
+código-fonte que a gerou. A decodificação usa a tabela de 256 posições do
+conjunto de instruções carregado (isa_sap), então qualquer instrução nova
+aparece aqui sem mudanças. O painel guarda o byte e o texto de cada linha: a cada atualização
+só as células que mudaram são desmontadas de novo, e só as linhas visíveis
+existem no canvas (rolagem virtual), então memórias grandes continuam leves.
+Referência: Tabela 10-2 (Código Op do SAP-1).
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+
+def disassemble(value, isa, data=False):
+    """
+    Desmonta um byte com a tabela de decodificação do conjunto de instruções.
+    Células marcadas como dado (DB) são mostradas como DB, e opcodes que não
+    estão na tabela como "???".
+    """
+    if data:
+        return f"DB {value}"
+    entry = isa.decode[value]
+    if entry is None:
+        return "???"
+    instruction, operand = entry
+    if instruction.operand != "none":
+        return f"{instruction.mnemonic} {operand:X}"
+    return instruction.mnemonic
+
+
+class DisassemblyPanel(ttk.Frame):
+    """Lista endereço | byte | instrução | fonte, atualizada de forma incremental."""
+
+    ROW_HEIGHT = 18
+    COLUMNS = ((4, "End"), (40, "Byte"), (80, "Instrução"), (160, "Fonte"))
+    FONT = ('Courier', 10)
+    PC_COLOR = "#ffffcc"
+
+    def __init__(self, parent, decode, visible_rows=8, width=330):
+        super().__init__(parent)
+        self.decode = decode              # decode(byte, data) -> texto da instrução
+        self.visible_rows = visible_rows
+        self._bytes = []                  # byte de cada endereço na última atualização
+        self._text = []                   # instrução desmontada de cada endereço
+        self._source_map = []             # (linha, tipo) ou None por endereço
+        self._source_lines = []           # texto do código-fonte montado
+        self._first = 0                   # primeiro endereço visível
+        self._pc = None
+
+        self.canvas = tk.Canvas(self, width=width, height=(visible_rows + 1) * self.ROW_HEIGHT,
+                                bg="white", highlightthickness=0, relief="sunken", borderwidth=1)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        # Cabeçalho fixo na primeira linha do canvas.
+        for x, title in self.COLUMNS:
+            self.canvas.create_text(x, self.ROW_HEIGHT // 2, anchor='w', text=title,
+                                    font=self.FONT + ('bold',))
+
+        # Um conjunto fixo de itens por linha visível, reaproveitado ao rolar.
+        self._slots = []
+        for row in range(visible_rows):
+            y = (row + 1) * self.ROW_HEIGHT
+            background = self.canvas.create_rectangle(0, y, width, y + self.ROW_HEIGHT,
+                                                      fill="white", outline="")
+            texts = tuple(self.canvas.create_text(x, y + self.ROW_HEIGHT // 2, anchor='w',
+                                                  font=self.FONT, text="")
+                          for x, _ in self.COLUMNS)
+            self._slots.append((background, texts))
+
+        self.canvas.bind("<MouseWheel>", lambda e: self.scroll_to(self._first - (e.delta // 120)))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll_to(self._first - 1))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll_to(self._first + 1))
+
+    def set_source(self, source_map, source_lines):
+        """Associa cada endereço à linha do código-fonte que o gerou (após a montagem)."""
+        self._source_map = list(source_map)
+        self._source_lines = list(source_lines)
+        # O tipo da célula (instrução ou DB) muda a desmontagem: refaz tudo na próxima atualização.
+        self._bytes = []
+
+    def refresh(self, memory, pc=None):
+        """Desmonta só as células que mudaram e redesenha só as que estão visíveis."""
+        if len(memory) != len(self._bytes):
+            self._bytes = [None] * len(memory)
+            self._text = [""] * len(memory)
+            self._first = min(self._first, max(0, len(memory) - self.visible_rows))
+
+        changed = [addr for addr, (old, new) in enumerate(zip(self._bytes, memory)) if old != new]
+        for addr in changed:
+            value = memory[addr]
+            self._bytes[addr] = value
+            self._text[addr] = self.decode(value, self._kind(addr) == "db")
+
+        last = self._first + self.visible_rows
+        for addr in changed:
+            if self._first <= addr < last:
+                self._draw_row(addr)
+
+        if pc != self._pc:
+            previous, self._pc = self._pc, pc
+            for addr in (previous, pc):
+                if addr is not None and self._first <= addr < last:
+                    self._draw_row(addr)
+            if pc is not None and not (self._first <= pc < last):
+                self.scroll_to(pc - self.visible_rows // 2)
+
+        self._update_scrollbar()
+
+    def scroll_to(self, first):
+        """Rola a lista para que `first` seja o primeiro endereço visível."""
+        first = max(0, min(first, len(self._bytes) - self.visible_rows))
+        if first == self._first:
+            return
+        self._first = first
+        for row in range(self.visible_rows):
+            self._draw_row(first + row)
+        self._update_scrollbar()
+
+    def _on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(round(float(amount) * len(self._bytes)))
+        elif unit == "pages":
+            self.scroll_to(self._first + int(amount) * self.visible_rows)
+        else:
+            self.scroll_to(self._first + int(amount))
+
+    def _update_scrollbar(self):
+        total = len(self._bytes) or 1
+        self.scrollbar.set(self._first / total, min(1.0, (self._first + self.visible_rows) / total))
+
+    def _kind(self, addr):
+        entry = self._source_map[addr] if addr < len(self._source_map) else None
+        return entry[1] if entry else None
+
+    def _source_text(self, addr):
+        entry = self._source_map[addr] if addr < len(self._source_map) else None
+        if entry is None:
+            return ""
+        line_num = entry[0]
+        if not 1 <= line_num <= len(self._source_lines):
+            # Mapa de outra versão do fonte (ex.: imagem editada): mostra a desmontagem.
+            return self._text[addr]
+        return f"{line_num}: {self._source_lines[line_num - 1].strip()}"
+
+    def _draw_row(self, addr):
+        background, (addr_item, byte_item, instr_item, source_item) = self._slots[addr - self._first]
+        if addr >= len(self._bytes):
+            for item in (addr_item, byte_item, instr_item, source_item):
+                self.canvas.itemconfig(item, text="")
+            self.canvas.itemconfig(background, fill="white")
+            return
+        self.canvas.itemconfig(addr_item, text=f"{addr:02X}")
+        self.canvas.itemconfig(byte_item, text=f"{self._bytes[addr]:02X}")
+        self.canvas.itemconfig(instr_item, text=self._text[addr],
+                               fill="red" if self._text[addr] == "???" else "black")
+        self.canvas.itemconfig(source_item, text=self._source_text(addr), fill="#666666")
+        self.canvas.itemconfig(background, fill=self.PC_COLOR if addr == self._pc else "white")
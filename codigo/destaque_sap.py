@@ -0,0 +1,124 @@
+"""
+Destaque de sintaxe e diagnósticos ao vivo no editor Assembly.
+
+A cada modificação (<<Modified>>) o editor é reanalisado depois de uma pequena
+pausa (debounce). Só as linhas entre o prefixo e o sufixo que não mudaram são
+tokenizadas de novo, e a análise de cada linha fica em cache pelo texto,
+então colar um código gerado de milhares de linhas continua rápido.
+A análise usa o mesmo parse_line() do montador, então o editor mostra
+exatamente os erros que a montagem encontraria.
+"""
+
+from montador_sap import assemble_lines, parse_line
+
+TAG_STYLES = {
+    "mnemonic": {"foreground": "#0033cc"},
+    "directive": {"foreground": "#8a2be2"},
+    "hex": {"foreground": "#b35900"},
+    "number": {"foreground": "#007700"},
+    "comment": {"foreground": "#888888"},
+    "error": {"foreground": "red", "underline": True},
+    "context_error": {"background": "#ffe0e0"},
+}
+TOKEN_TAGS = tuple(f"syn_{kind}" for kind in TAG_STYLES if kind != "context_error")
+
+CACHE_LIMIT = 20000
+
+
+class SyntaxHighlighter:
+    """Liga o destaque incremental a um tk.Text e escreve os diagnósticos em diagnostics_var."""
+
+    def __init__(self, editor, diagnostics_var=None, delay_ms=150, isa=None):
+        self.editor = editor
+        self.isa = isa
+        self.diagnostics_var = diagnostics_var
+        self.delay_ms = delay_ms
+        self._lines = []    # texto de cada linha na última análise
+        self._parsed = []   # ParsedLine de cada linha
+        self._cache = {}    # texto da linha -> ParsedLine
+        self._pending = None
+
+        for kind, options in TAG_STYLES.items():
+            editor.tag_configure(f"syn_{kind}", **options)
+        # Os destaques de execução e de erro de montagem continuam por cima.
+        editor.tag_lower("syn_context_error")
+        editor.tag_raise("current_line")
+        editor.tag_raise("error_line")
+
+        editor.bind("<<Modified>>", self._on_modified, add="+")
+        editor.edit_modified(False)
+
+    def _on_modified(self, _event):
+        if not self.editor.edit_modified():
+            return
+        self.editor.edit_modified(False)
+        if self._pending is not None:
+            self.editor.after_cancel(self._pending)
+        self._pending = self.editor.after(self.delay_ms, self.refresh)
+
+    def _parse(self, line):
+        parsed = self._cache.get(line)
+        if parsed is None:
+            if len(self._cache) > CACHE_LIMIT:
+                self._cache.clear()
+            parsed = self._cache[line] = parse_line(line, self.isa)
+        return parsed
+
+    def refresh(self):
+        """Reanalisa as linhas alteradas desde a última chamada e atualiza tags e diagnósticos."""
+        self._pending = None
+        lines = self.editor.get("1.0", "end-1c").split("\n")
+        old = self._lines
+
+        limit = min(len(old), len(lines))
+        prefix = 0
+        while prefix < limit and old[prefix] == lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old[-1 - suffix] == lines[-1 - suffix]:
+            suffix += 1
+
+        stop = len(lines) - suffix
+        changed = [self._parse(lines[i]) for i in range(prefix, stop)]
+        self._parsed[prefix:len(old) - suffix] = changed
+        self._lines = lines
+
+        if prefix < stop:
+            self._retag(prefix, stop, changed)
+        self._update_diagnostics()
+
+    def _retag(self, start, stop, parsed_lines):
+        """Refaz as tags de token das linhas [start, stop) (índices a partir de 0)."""
+        first, last = f"{start + 1}.0", f"{stop}.end"
+        for tag in TOKEN_TAGS:
+            self.editor.tag_remove(tag, first, last)
+
+        ranges = {}
+        for offset, parsed in enumerate(parsed_lines):
+            line = start + offset + 1
+            for kind, col_start, col_end in parsed.tokens:
+                ranges.setdefault(kind, []).extend((f"{line}.{col_start}", f"{line}.{col_end}"))
+        # Uma chamada ao Tk por tipo de token, com todos os intervalos de uma vez.
+        for kind, indices in ranges.items():
+            self.editor.tag_add(f"syn_{kind}", *indices)
+
+    def _update_diagnostics(self):
+        _, errors, _ = assemble_lines(self._parsed)
+
+        # Erros que dependem de outras linhas (DB sem ORG, memória cheia) marcam a linha inteira.
+        self.editor.tag_remove("syn_context_error", "1.0", "end")
+        context = []
+        for line_num, _ in errors:
+            if self._parsed[line_num - 1].error is None:
+                context.extend((f"{line_num}.0", f"{line_num}.end"))
+        if context:
+            self.editor.tag_add("syn_context_error", *context)
+
+        if self.diagnostics_var is None:
+            return
+        if not errors:
+            self.diagnostics_var.set("")
+            return
+        line_num, message = errors[0]
+        more = f" (+{len(errors) - 1} erro(s))" if len(errors) > 1 else ""
+        self.diagnostics_var.set(f"Linha {line_num}: {message}{more}")
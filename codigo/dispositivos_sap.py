@@ -0,0 +1,338 @@
+"""
+Dispositivos de entrada e saída do Emulador SAP-1.
+
+Dispositivos de saída recebem cada valor enviado pela instrução OUT.
+Todos seguem a mesma interface (write, flush, close); os que escrevem em
+arquivo, pipe ou socket acumulam os valores num buffer e só fazem a chamada
+de sistema quando ele enche ou no flush(), para que execuções longas possam
+gerar milhares de valores sem custo por valor.
+
+A porta de entrada alimenta a instrução IN a partir de um arquivo, pipe ou
+gerador, lido por uma thread produtora com fila limitada (back-pressure).
+"""
+
+import errno
+import os
+import queue
+import socket
+import stat
+import threading
+from collections import deque
+
+
+class OutputDevice:
+    """Interface dos dispositivos ligados ao Registrador de Saída."""
+
+    def write(self, value):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class RingBufferOutput(OutputDevice):
+    """Guarda em memória os últimos `capacity` valores de saída."""
+
+    def __init__(self, capacity=1024):
+        self.buffer = deque(maxlen=capacity)
+
+    def write(self, value):
+        self.buffer.append(value)
+
+    def values(self):
+        return list(self.buffer)
+
+    def clear(self):
+        self.buffer.clear()
+
+
+class BufferedOutput(OutputDevice):
+    """
+    Base dos dispositivos com buffer.
+    Em modo texto cada valor vira uma linha decimal; em modo binário, um byte.
+    """
+
+    def __init__(self, binary=False, buffer_size=4096):
+        self.binary = binary
+        self.buffer_size = buffer_size
+        self._buffer = bytearray()
+
+    def write(self, value):
+        if self.binary:
+            self._buffer.append(value & 0xFF)
+        else:
+            self._buffer += b"%d\n" % value
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._send(bytes(self._buffer))
+            self._buffer.clear()
+
+    def _send(self, data):
+        raise NotImplementedError
+
+
+class FileOutput(BufferedOutput):
+    """Arquivo em modo append: execuções sucessivas acumulam no mesmo arquivo."""
+
+    def __init__(self, path, binary=False, buffer_size=4096):
+        super().__init__(binary, buffer_size)
+        self.path = path
+        self._file = open(path, "ab", buffering=0)
+
+    def _send(self, data):
+        self._file.write(data)
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._file.close()
+
+
+class PipeOutput(BufferedOutput):
+    """
+    Pipe nomeado (FIFO), criado se ainda não existir.
+    O FIFO é aberto e escrito sem bloquear (O_NONBLOCK), então um flush nunca trava
+    a janela: enquanto não há leitor, ou com o pipe cheio, os dados ficam pendentes
+    no buffer até `max_pending` bytes; acima disso os mais antigos são descartados
+    (contados em `dropped`).
+    """
+
+    def __init__(self, path, binary=False, buffer_size=4096, max_pending=1 << 20):
+        super().__init__(binary, buffer_size)
+        self.path = path
+        self.max_pending = max_pending
+        self.dropped = 0
+        if not os.path.exists(path):
+            os.mkfifo(path)
+        self._fd = None
+
+    def flush(self):
+        if not self._buffer:
+            return
+        if self._fd is None:
+            try:
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError as e:
+                if e.errno != errno.ENXIO:  # ENXIO: ainda não há leitor
+                    raise
+        if self._fd is not None:
+            try:
+                sent = os.write(self._fd, self._buffer)
+            except BlockingIOError:
+                sent = 0
+            del self._buffer[:sent]
+        excess = len(self._buffer) - self.max_pending
+        if excess > 0:
+            if not self.binary:
+                excess = self._buffer.find(b"\n", excess - 1) + 1  # descarta linhas inteiras
+            del self._buffer[:excess]
+            self.dropped += excess
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+class SocketOutput(BufferedOutput):
+    """Socket local: caminho (str) para socket Unix ou (host, porta) para TCP."""
+
+    def __init__(self, address, binary=False, buffer_size=4096):
+        super().__init__(binary, buffer_size)
+        family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+        self._socket = socket.socket(family, socket.SOCK_STREAM)
+        self._socket.connect(address)
+
+    def _send(self, data):
+        self._socket.sendall(data)
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._socket.close()
+
+
+def open_output(spec, binary=False):
+    """
+    Cria um dispositivo de saída a partir de uma especificação:
+        memoria[:N]        buffer circular com N valores
+        tcp:host:porta     socket TCP
+        unix:caminho       socket Unix
+        pipe:caminho       pipe nomeado
+        caminho            arquivo; se já existir e for FIFO ou socket, usa o tipo certo
+    """
+    kind, _, rest = spec.partition(":")
+    if kind == "memoria":
+        return RingBufferOutput(int(rest) if rest else 1024)
+    if kind == "tcp":
+        host, _, port = rest.rpartition(":")
+        return SocketOutput((host or "127.0.0.1", int(port)), binary)
+    if kind == "unix":
+        return SocketOutput(rest, binary)
+    if kind == "pipe":
+        return PipeOutput(rest, binary)
+
+    if os.path.exists(spec):
+        mode = os.stat(spec).st_mode
+        if stat.S_ISFIFO(mode):
+            return PipeOutput(spec, binary)
+        if stat.S_ISSOCK(mode):
+            return SocketOutput(spec, binary)
+    return FileOutput(spec, binary)
+
+
+class InputPort:
+    """
+    Porta de entrada lida pela instrução IN.
+    Uma thread consome a fonte (qualquer iterável de inteiros de 0 a 255) e enche uma
+    fila de `capacity` valores; com a fila cheia a thread para de ler, então um produtor
+    mais rápido que o programa fica bloqueado no próprio pipe em vez de consumir memória.
+    Um erro da fonte (valor inválido, falha de leitura) segue pela fila depois dos
+    valores já lidos: a porta termina e a mensagem fica em `error`.
+    close() encerra a porta; a thread desiste da fila e fecha a fonte.
+    """
+
+    _END = object()
+
+    def __init__(self, source, capacity=256):
+        self.exhausted = False
+        self.error = None
+        self._closed = threading.Event()
+        self._queue = queue.Queue(maxsize=capacity)
+        self._thread = threading.Thread(target=self._produce, args=(source,), daemon=True)
+        self._thread.start()
+
+    def _produce(self, source):
+        try:
+            for value in source:
+                if not 0 <= value <= 0xFF:
+                    raise ValueError(f"Valor fora do range de 8 bits (0-255): {value}.")
+                if not self._put(value):
+                    break
+        except (OSError, ValueError) as e:
+            self._put(_PortError(str(e)))
+        finally:
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+            self._put(self._END)
+
+    def _put(self, item):
+        """Põe um item na fila; com a fila cheia espera, mas desiste se a porta for fechada."""
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def close(self):
+        """
+        Encerra a porta: leituras passam a retornar None e a thread fecha a fonte.
+        Uma leitura bloqueada na fonte (FIFO sem escritor) só termina no próximo dado ou EOF.
+        """
+        self._closed.set()
+        self.exhausted = True
+
+    def __iter__(self):
+        """Itera sobre os valores restantes, esperando pelos que ainda não chegaram."""
+        while True:
+            value = self.read()
+            if value is None:
+                return
+            yield value
+
+    def read(self, timeout=None):
+        """
+        Próximo valor da porta. Retorna None se o tempo de espera acabar ou se a
+        fonte terminou (nesse caso `exhausted` fica True).
+        """
+        if self.exhausted:
+            return None
+        try:
+            value = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if value is self._END:
+            self.exhausted = True
+            return None
+        if isinstance(value, _PortError):
+            self.error = value.message
+            self.exhausted = True
+            return None
+        return value
+
+
+class _PortError:
+    """Erro da fonte da porta de entrada, repassado pela fila à thread da execução."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def parse_value(token):
+    """
+    Valor de 8 bits escrito em decimal ou hexadecimal com prefixo 0x.
+    Zeros à esquerda não mudam a base ("010" é 10). Levanta ValueError.
+    """
+    text = token.decode("ascii", "replace") if isinstance(token, bytes) else token
+    try:
+        value = int(text[2:], 16) if text[:2].lower() == "0x" else int(text, 10)
+    except ValueError:
+        raise ValueError(f"Valor inválido: {text!r}.") from None
+    if not 0 <= value <= 0xFF:
+        raise ValueError(f"Valor fora do range de 8 bits (0-255): {text}.")
+    return value
+
+
+def read_values(stream, binary=False, chunk_size=4096):
+    """
+    Gera os valores de um arquivo aberto em modo binário.
+    Em modo texto aceita números decimais ou hexadecimais (0x..) de 0 a 255,
+    separados por espaços, vírgulas ou linhas; ';' e '#' iniciam comentários.
+    Um valor inválido levanta ValueError com o número da linha.
+    """
+    if binary:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                return
+            yield from chunk
+    for line_num, line in enumerate(stream, 1):
+        line = line.split(b";")[0].split(b"#")[0]
+        for token in line.replace(b",", b" ").split():
+            try:
+                yield parse_value(token)
+            except ValueError as e:
+                raise ValueError(f"Linha {line_num}: {e}") from None
+
+
+def _stream_values(path, binary):
+    with open(path, "rb") as stream:
+        yield from read_values(stream, binary)
+
+
+def open_input(spec, binary=False, capacity=256):
+    """
+    Cria uma porta de entrada a partir de uma especificação:
+        pipe:caminho       pipe nomeado (criado se não existir)
+        caminho            arquivo ou FIFO existente
+    """
+    kind, _, rest = spec.partition(":")
+    if kind == "pipe":
+        if not os.path.exists(rest):
+            os.mkfifo(rest)
+        spec = rest
+    return InputPort(_stream_values(spec, binary), capacity)
@@ -11,36 +11,82 @@ Data: 20/06/2025
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox
-import time
+from tkinter import ttk, messagebox, filedialog, simpledialog
+import os
 import re # Módulo 're' para expressões regulares
 
-# Tamanho da memória do SAP-1, conforme a arquitetura.
-MEMORY_SIZE = 16
+from desmontador_sap import DisassemblyPanel, disassemble
+from destaque_sap import SyntaxHighlighter
+from dispositivos_sap import RingBufferOutput, open_input, open_output
+from isa_sap import JUMP_CONDITIONS, alu, load_isa
+from montador_sap import MEMORY_SIZE, assemble_source
+from motor_sap import (STOP_HLT, STOP_INPUT_END, STOP_INVALID, STOP_LIMIT, STOP_LOOP, STOP_NO_INPUT, STOP_PC,
+                       pack_state)
+from rastro_sap import (CAT_EMULATION, CAT_INSTRUCTION, CAT_SLEEP, CAT_STATE, CAT_STATUS, CAT_TK,
+                        TraceBuffer)
+from ritmo_sap import QUALITY_FLASH, QUALITY_FULL, QUALITY_NAMES, FrameBudget
+
+# Limite padrão de ciclos de máquina (instruções) de uma execução contínua.
+DEFAULT_CYCLE_LIMIT = 10000
 
 class SAP1Emulator:
-    def __init__(self, root):
+    def __init__(self, root, isa=None):
         """
         Inicialização do emulador SAP-1.
         Baseado na lógica do Capítulo 10 do livro de Malvino.
+        isa: conjunto de instruções compilado (padrão: isa/sap1.json).
         """
         self.root = root
         self.root.title("Emulador SAP-1 - Arquitetura de Computadores")
-        
-        self.running = False
-        self.clock_speed = 1.0  # Velocidade padrão do clock (1Hz).
-        
-        # Variáveis para a funcionalidade de "Entrada de Expressão", inspirada em aula.
+        self.init_state(isa, frame_budget=FrameBudget(on_change=self._show_quality))
+
+        # Variável para a funcionalidade de "Entrada de Expressão", inspirada em aula.
         self.current_expression = tk.StringVar(value="")
+        # Modo Portas: executa o circuito em nível de portas (portas_sap) em vez do RTL.
+        self.gate_mode = tk.BooleanVar(value=False)
+        # Execução contínua: para no limite de ciclos ou quando o estado da máquina se repete.
+        self.cycle_limit = tk.IntVar(value=DEFAULT_CYCLE_LIMIT)
+        # Exportação de animação em andamento (roda numa thread separada).
+        self.exporting = False
+
+        self.setup_ui()
+        self.initialize_cpu()
+
+    def init_state(self, isa=None, clock_speed=1.0, output_devices=(), input_port=None,
+                   frame_budget=None, trace=None):
+        """
+        Estado do emulador que não depende do Tk (também usado pelo HeadlessEmulator).
+        Os widgets e as variáveis do Tk são criados depois, por quem chama.
+        """
+        self.isa = isa or load_isa()
+        self.running = False
+        self.clock_speed = clock_speed  # Velocidade padrão do clock (1Hz).
         self.expression_numbers = []
         self.expression_operators = []
-        
+
         # Controle de destaque de linha no editor Assembly.
-        self.current_assembly_line = -1 
+        self.current_assembly_line = -1
+
+        # Dispositivos que recebem cada valor da instrução OUT (o histórico fica no buffer circular).
+        self.output_history = RingBufferOutput()
+        self.output_devices = [self.output_history, *output_devices]
+        self.output_file_device = None
+        # Porta de entrada lida pela instrução IN (None = nenhuma fonte conectada).
+        self.input_port = input_port
+        # Ritmo das pausas e nível de detalhe da animação, ajustado ao custo real de desenho.
+        self.frame_budget = frame_budget if frame_budget is not None else FrameBudget()
+        # Rastro de eventos (estados T, redesenhos e pausas), exportável para o Perfetto.
+        self.trace = trace if trace is not None else TraceBuffer()
+        # Código e mapa de fonte (endereço -> linha) da última montagem, salvos nas imagens JSON.
+        self.assembled_source = None
+        self.source_map = None
+        # Emulador sem janela que confere o Modo Portas (criado no primeiro passo).
+        self._gate_reference = None
+        # Thread da execução contínua em andamento (None = nenhuma).
+        self._run_thread = None
+        # Incrementado pelo Reset: quem espera a Porta de Entrada desiste ao ver a mudança.
+        self._reset_count = 0
 
-        self.setup_ui()
-        self.initialize_cpu()
-        
     def setup_ui(self):
         """
         Configuração da interface gráfica do emulador.
@@ -96,6 +142,15 @@ class SAP1Emulator:
         scrollbar = ttk.Scrollbar(code_frame, orient=tk.VERTICAL, command=self.editor.yview)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.editor['yscrollcommand'] = scrollbar.set
+
+        self.diagnostics_var = tk.StringVar(value="")
+        ttk.Label(code_input_frame, textvariable=self.diagnostics_var, font=('Arial', 9),
+                  foreground="#b00000", wraplength=320).pack(fill=tk.X)
+
+        disassembly_frame = ttk.LabelFrame(code_input_frame, text="Desmontagem da Memória", padding="5")
+        disassembly_frame.pack(fill=tk.X, pady=5)
+        self.disassembly = DisassemblyPanel(disassembly_frame, self.disassemble_byte)
+        self.disassembly.pack(fill=tk.X)
         
         control_frame = ttk.Frame(main_frame, padding="10")
         control_frame.pack(fill=tk.Y, side=tk.LEFT)
@@ -110,6 +165,29 @@ class SAP1Emulator:
                   command=self.step).pack(fill=tk.X, pady=5)
         ttk.Button(control_frame, text="Reset", 
                   command=self.reset_cpu).pack(fill=tk.X, pady=5)
+        ttk.Button(control_frame, text="Exportar Animação", 
+                  command=self.export_animation).pack(fill=tk.X, pady=5)
+        ttk.Button(control_frame, text="Saída para Arquivo", 
+                  command=self.choose_output_file).pack(fill=tk.X, pady=5)
+        ttk.Button(control_frame, text="Entrada de Arquivo", 
+                  command=self.choose_input_file).pack(fill=tk.X, pady=5)
+        ttk.Button(control_frame, text="Comparar Máquinas", 
+                  command=self.open_comparison).pack(fill=tk.X, pady=5)
+        ttk.Button(control_frame, text="Salvar Imagem", 
+                  command=self.save_memory_image).pack(fill=tk.X, pady=5)
+        ttk.Button(control_frame, text="Carregar Imagem", 
+                  command=self.load_memory_image).pack(fill=tk.X, pady=5)
+        ttk.Button(control_frame, text="Exportar Rastro", 
+                  command=self.export_trace).pack(fill=tk.X, pady=5)
+        
+        # O netlist do Modo Portas só implementa o SAP-1.
+        ttk.Checkbutton(control_frame, text="Modo Portas (RTL)", variable=self.gate_mode,
+                        state=tk.NORMAL if self.gates_supported() else tk.DISABLED).pack(fill=tk.X, pady=5)
+        
+        limit_frame = ttk.LabelFrame(control_frame, text="Limite de Ciclos", padding="5")
+        limit_frame.pack(fill=tk.X, pady=5)
+        ttk.Spinbox(limit_frame, from_=1, to=1_000_000, increment=1000,
+                    textvariable=self.cycle_limit, width=10).pack(fill=tk.X)
         
         speed_frame = ttk.LabelFrame(control_frame, text="Velocidade do Clock", padding="5")
         speed_frame.pack(fill=tk.X, pady=10)
@@ -126,9 +204,14 @@ class SAP1Emulator:
         
         self.status_var = tk.StringVar()
         self.status_var.set("Pronto para executar")
-        status_bar = ttk.Label(self.root, textvariable=self.status_var, 
+        status_frame = ttk.Frame(self.root)
+        status_frame.pack(fill=tk.X, side=tk.BOTTOM)
+        self.quality_var = tk.StringVar(value=f"Animação: {QUALITY_NAMES[QUALITY_FULL]}")
+        ttk.Label(status_frame, textvariable=self.quality_var,
+                  relief=tk.SUNKEN, padding="5", font=('Arial', 10)).pack(side=tk.RIGHT)
+        status_bar = ttk.Label(status_frame, textvariable=self.status_var, 
                              relief=tk.SUNKEN, padding="5", font=('Arial', 10))
-        status_bar.pack(fill=tk.X, side=tk.BOTTOM)
+        status_bar.pack(fill=tk.X, side=tk.LEFT, expand=True)
         
         self.draw_cpu_components()
         self.draw_legend()
@@ -136,6 +219,9 @@ class SAP1Emulator:
         self.editor.tag_configure("current_line", background="#ffffcc")
         self.editor.tag_configure("error_line", background="red", foreground="white")
 
+        # Destaque de sintaxe e diagnósticos enquanto o código é digitado.
+        self.highlighter = SyntaxHighlighter(self.editor, self.diagnostics_var, isa=self.isa)
+
     def draw_cpu_components(self):
         """
         Desenha os componentes da CPU SAP-1 no canvas.
@@ -185,6 +271,8 @@ class SAP1Emulator:
         # ULA (Unidade Lógica Aritmética / Somador-Subtrator) - Seção 10.1
         create_component_with_shadow(450, 200, 600, 275, reg_color, "alu", "ULA", "alu_text", "alu_value", "", ('Arial', 14, 'bold'), ('Courier', 12))
         self.canvas.create_line(525, 275, 525, BUS_Y, width=2, fill=bus_color, tags="alu_to_bus_main")
+        # Flags Z e C, atualizadas por ADD e SUB e testadas pelos desvios JZ, JC e JNZ
+        self.canvas.create_text(595, 207, anchor="ne", text="Z=0 C=0", tags="flags_value", font=('Courier', 9))
 
         # Memória RAM (16 bytes, 16x8) - Seção 10.1 e Fig. 10-1
         MEM_X_START = 650
@@ -239,6 +327,13 @@ class SAP1Emulator:
             self.led_rects.append(led)
             self.canvas.create_text(x+7, led_start_y+25, text=f"{7-i}", font=('Arial', 8))
 
+        # Palavra de controle e contador em anel (visíveis no Modo Portas)
+        self.canvas.create_text(425, 540, text="", tags="con_text", font=('Courier', 10, 'bold'), fill="#990000")
+
+        # Porta de Entrada (instrução IN), alimentada por arquivo, pipe ou gerador
+        create_component_with_shadow(250, 400, 400, 475, reg_color, "input_reg", "ENTRADA", "input_text", "input_value", "--", ('Arial', 14, 'bold'), ('Courier', 12))
+        self.canvas.create_line(325, 400, 325, BUS_Y, width=2, fill=bus_color, tags="input_reg_to_bus_main")
+
         # Clock (CLK) - Seção 10.7 (Circuitos de Relógio) e Fig. 10-2
         self.canvas.create_oval(700, 400, 775, 475, fill="#f0f0f0", width=2, tags="clock", outline=bus_color)
         self.canvas.create_text(737.5, 437.5, text="CLK", tags="clock_text", font=('Arial', 14, 'bold'))
@@ -375,18 +470,18 @@ class SAP1Emulator:
             "B": 0,       # Registrador B (8 bits)
             "memory": [0] * MEMORY_SIZE,  # Memória de 16 bytes (16x8 RAM) - Seção 10.1
             "output": 0,  # Registrador de Saída (8 bits)
+            "input": 0,   # Último valor lido da Porta de Entrada (8 bits)
             "flags": {"Z": 0, "C": 0}  # Flags (Zero e Carry)
         }
         
-        # Mapeamento de opcodes para instruções e funções de execução.
-        # Referência: Tabela 10-1 e Tabela 10-2 do artigo.
-        self.instructions = {
-            0b0000: ("LDA", self.lda),
-            0b0001: ("ADD", self.add),
-            0b0010: ("SUB", self.sub),
-            0b1110: ("OUT", self.out),
-            0b1111: ("HLT", self.hlt)
-        }
+        # Estado das micro-operações da instrução em execução.
+        self._instruction = None
+        self._operand = 0
+        self._alu_result = 0
+        # Estados já visitados na execução contínua atual (detecção de laço infinito).
+        self.seen_states = set()
+        # Motivo da última parada (códigos STOP_* de motor_sap) ou None.
+        self.stop_reason = None
         
         self.update_visualization()
         self.current_assembly_line = -1
@@ -395,12 +490,15 @@ class SAP1Emulator:
         """
         Atualiza os valores exibidos na interface gráfica da CPU (registradores, memória, LEDs).
         """
+        start = self.trace.now()
         self.canvas.itemconfig("pc_value", text=f"0x{self.cpu['PC']:01X}")
         self.canvas.itemconfig("mar_value", text=f"0x{self.cpu['MAR']:01X}")
-        self.canvas.itemconfig("ir_value", text=f"0x{self.cpu['IR']:02X}")
+        self.canvas.itemconfig("ir_value", text=f"0x{self.cpu['IR']:02X} {self.disassemble_byte(self.cpu['IR'])}")
         self.canvas.itemconfig("acc_value", text=f"0x{self.cpu['ACC']:02X}")
         self.canvas.itemconfig("b_reg_value", text=f"0x{self.cpu['B']:02X}")
+        self.canvas.itemconfig("flags_value", text=f"Z={self.cpu['flags']['Z']} C={self.cpu['flags']['C']}")
         self.canvas.itemconfig("output_value", text=f"0x{self.cpu['output']:02X}")
+        self.canvas.itemconfig("input_value", text=f"0x{self.cpu['input']:02X}" if self.input_port else "--")
         
         for i in range(MEMORY_SIZE):
             self.canvas.itemconfig(f"mem_text_{i}", text=f"{self.cpu['memory'][i]:02X}")
@@ -419,6 +517,15 @@ class SAP1Emulator:
             else:
                 self.canvas.itemconfig(self.led_rects[7-i], fill="lightgray")
 
+        if self.disassembly is not None:
+            self.disassembly.refresh(self.cpu['memory'], self.cpu['PC'])
+
+        self.trace.complete("update_visualization", CAT_TK, start)
+
+    def disassemble_byte(self, value, data=False):
+        """Desmonta um byte com a tabela de decodificação do conjunto de instruções."""
+        return disassemble(value, self.isa, data)
+
     def animate_main_bus_transfer(self, source_comp_tag, target_comp_tag, duration=0.3):
         """
         Anima a transferência de dados pelo Barramento W.
@@ -436,6 +543,10 @@ class SAP1Emulator:
         if target_comp_tag == "alu":
             target_conn_tag = "alu_to_bus_main"
 
+        if self.frame_budget.quality < QUALITY_FULL:
+            self._flash_endpoints(source_comp_tag, target_comp_tag, (duration + 0.1) / self.clock_speed)
+            return
+
         try:
             target_obj_color = self.canvas.itemcget(target_comp_tag, "fill")
         except:
@@ -444,18 +555,18 @@ class SAP1Emulator:
         self.canvas.itemconfig(source_comp_tag, fill=active_color)
         if source_conn_tag and self.canvas.find_withtag(source_conn_tag):
             self.canvas.itemconfig(source_conn_tag, fill="red", width=3)
-        self.canvas.update()
-        time.sleep(duration / (3 * self.clock_speed))
+        self._render()
+        self._sleep(duration / (3 * self.clock_speed))
 
         self.canvas.itemconfig("main_bus", fill="red", width=5)
-        self.canvas.update()
-        time.sleep(duration / (3 * self.clock_speed))
+        self._render()
+        self._sleep(duration / (3 * self.clock_speed))
 
         if target_conn_tag and self.canvas.find_withtag(target_conn_tag):
             self.canvas.itemconfig(target_conn_tag, fill="red", width=3)
         self.canvas.itemconfig(target_comp_tag, fill=active_color)
-        self.canvas.update()
-        time.sleep(duration / (3 * self.clock_speed))
+        self._render()
+        self._sleep(duration / (3 * self.clock_speed))
 
         self.canvas.itemconfig(source_comp_tag, fill=original_reg_color)
         if source_conn_tag and self.canvas.find_withtag(source_conn_tag):
@@ -464,8 +575,8 @@ class SAP1Emulator:
         if target_conn_tag and self.canvas.find_withtag(target_conn_tag):
             self.canvas.itemconfig(target_conn_tag, fill=original_bus_color, width=2)
         self.canvas.itemconfig(target_comp_tag, fill=target_obj_color)
-        self.canvas.update()
-        time.sleep(0.1 / self.clock_speed)
+        self._render()
+        self._sleep(0.1 / self.clock_speed)
 
     def animate_direct_transfer(self, source_comp_tag, target_comp_tag, line_tag, duration=0.3):
         """
@@ -475,6 +586,10 @@ class SAP1Emulator:
         original_bus_color = "#666666"
         original_reg_color = "#e6f3ff"
 
+        if self.frame_budget.quality < QUALITY_FULL:
+            self._flash_endpoints(source_comp_tag, target_comp_tag, (duration + 0.1) / self.clock_speed)
+            return
+
         try:
             target_obj_color = self.canvas.itemcget(target_comp_tag, "fill")
         except:
@@ -483,27 +598,30 @@ class SAP1Emulator:
         self.canvas.itemconfig(source_comp_tag, fill=active_color)
         self.canvas.itemconfig(line_tag, fill="red", width=3)
         self.canvas.itemconfig(target_comp_tag, fill=active_color)
-        self.canvas.update()
-        time.sleep(duration / self.clock_speed)
+        self._render()
+        self._sleep(duration / self.clock_speed)
 
         self.canvas.itemconfig(source_comp_tag, fill=original_reg_color)
         self.canvas.itemconfig(line_tag, fill=original_bus_color, width=2)
         self.canvas.itemconfig(target_comp_tag, fill=target_obj_color)
-        self.canvas.update()
-        time.sleep(0.1 / self.clock_speed)
+        self._render()
+        self._sleep(0.1 / self.clock_speed)
 
     def animate_clock(self):
         """
         Anima o pulso do clock.
         Referência: Fig. 10-2b e Exemplo 10.6 do artigo.
         """
+        if self.frame_budget.quality < QUALITY_FULL:
+            self._sleep(0.8 / self.clock_speed)
+            return
         for _ in range(2):
             self.canvas.itemconfig("clock", fill="#ff9999")
-            self.canvas.update()
-            time.sleep(0.2 / self.clock_speed)
+            self._render()
+            self._sleep(0.2 / self.clock_speed)
             self.canvas.itemconfig("clock", fill="#f0f0f0")
-            self.canvas.update()
-            time.sleep(0.2 / self.clock_speed)
+            self._render()
+            self._sleep(0.2 / self.clock_speed)
     
     def highlight_component(self, component_tag, duration=0.5):
         """
@@ -511,6 +629,10 @@ class SAP1Emulator:
         """
         original_reg_color = "#e6f3ff"
         original_text_color = "black"
+
+        if self.frame_budget.quality < QUALITY_FLASH:
+            self._sleep(duration / self.clock_speed)
+            return
         
         try:
             original_fill = self.canvas.itemcget(component_tag, "fill")
@@ -524,15 +646,56 @@ class SAP1Emulator:
         except:
              pass
 
-        self.canvas.update()
-        time.sleep(duration / self.clock_speed)
+        self._render()
+        self._sleep(duration / self.clock_speed)
         
         self.canvas.itemconfig(component_tag, fill=original_fill)
         try:
             self.canvas.itemconfig(text_tag, fill=original_text_color)
         except:
             pass
+        self._render()
+
+    def _flash_endpoints(self, source_comp_tag, target_comp_tag, seconds):
+        """
+        Animação reduzida de uma transferência: acende só a origem e o destino
+        (qualidade "só destaques") ou apenas espera (qualidade "só valores").
+        """
+        if self.frame_budget.quality < QUALITY_FLASH:
+            self._sleep(seconds)
+            return
+        colors = {}
+        for tag in (source_comp_tag, target_comp_tag):
+            colors[tag] = self.canvas.itemcget(tag, "fill")
+            self.canvas.itemconfig(tag, fill="#ff9999")
+        self._render()
+        self._sleep(seconds)
+        for tag, color in colors.items():
+            self.canvas.itemconfig(tag, fill=color)
+
+    def _show_quality(self, quality):
+        self.quality_var.set(f"Animação: {QUALITY_NAMES[quality]}")
+
+    def _render(self):
+        """Redesenha a janela, registrando no rastro o tempo gasto pelo Tk."""
+        start = self.trace.now()
         self.canvas.update()
+        self.trace.complete("canvas.update", CAT_TK, start)
+
+    def _sleep(self, seconds):
+        """
+        Pausa da animação. Centralizada aqui para que emuladores sem janela
+        (ex.: exportação de animação) possam contar o tempo em vez de dormir.
+        O FrameBudget desconta da pausa o tempo já gasto desenhando.
+        """
+        start = self.trace.now()
+        self.frame_budget.sleep(seconds)
+        self.trace.complete("pausa", CAT_SLEEP, start, {"pedido_ms": round(seconds * 1000, 3)})
+
+    def _show_error(self, title, message):
+        """Exibe uma mensagem de erro ao usuário."""
+        with self.frame_budget.waiting():
+            messagebox.showerror(title, message)
 
     def highlight_assembly_line(self, line_num):
         """
@@ -583,151 +746,135 @@ DB 3     ; Define Byte: Armazena o valor 3 no endereço 0F.
         """
         Monta o código Assembly para código de máquina.
         Referência: Seção 10.3 (Programação do SAP-1) e Tabela 10-2 (Código Op do SAP-1).
+        Todos os erros do código são marcados no editor, não apenas o primeiro.
         """
-        code = self.editor.get(1.0, tk.END)
-        lines = code.split('\n')
-        
-        assembled_memory = [0] * MEMORY_SIZE
-        
-        instruction_ptr = 0
-        data_ptr = None
-        
         self.editor.tag_remove("error_line", "1.0", tk.END)
 
-        try:
-            for line_num, line in enumerate(lines, 1):
-                original_line_content = line
-                line = line.strip()
-                if not line:
-                    continue
-                
-                comment_start = line.find(';')
-                if comment_start != -1:
-                    line = line[:comment_start].strip()
-                
-                if not line:
-                    continue
-
-                parts = line.split()
-                mnemonic = parts[0].upper()
-
-                if mnemonic == "ORG":
-                    if len(parts) < 2:
-                        raise ValueError(f"ORG requer um endereço. Linha {line_num}.")
-                    addr = int(parts[1], 16)
-                    if not (0 <= addr < MEMORY_SIZE):
-                        raise ValueError(f"Endereço ORG fora do range (00-{MEMORY_SIZE-1:01X}). Linha {line_num}.")
-                    data_ptr = addr
-                    continue
-                
-                elif mnemonic == "DB":
-                    if data_ptr is None:
-                        raise ValueError(f"DB requer um ORG antes. Linha {line_num}.")
-                    if len(parts) < 2:
-                        raise ValueError(f"DB requer um valor. Linha {line_num}.")
-                    
-                    value = int(parts[1])
-                    if not (0 <= value <= 255):
-                        raise ValueError(f"Valor DB deve ser entre 0 e 255. Linha {line_num}.")
-                    
-                    if data_ptr >= MEMORY_SIZE:
-                        raise ValueError(f"Memória insuficiente para DB (máx. {MEMORY_SIZE} bytes, endereço {MEMORY_SIZE-1:01X}). Linha {line_num}.")
-                    
-                    assembled_memory[data_ptr] = value
-                    data_ptr += 1
-                    continue
-                
-                if instruction_ptr >= MEMORY_SIZE:
-                    raise ValueError(f"Programa muito grande para memória (máx. {MEMORY_SIZE} bytes, endereço {MEMORY_SIZE-1:01X}). Linha {line_num}.")
-
-                if mnemonic not in ["LDA", "ADD", "SUB", "OUT", "HLT"]:
-                    raise ValueError(f"Instrução inválida: {mnemonic}. Linha {line_num}.")
-                
-                opcode = {
-                    "LDA": 0b0000,
-                    "ADD": 0b0001,
-                    "SUB": 0b0010,
-                    "OUT": 0b1110,
-                    "HLT": 0b1111
-                }[mnemonic]
-                
-                operand = 0
-                if mnemonic in ["LDA", "ADD", "SUB"]:
-                    if len(parts) < 2:
-                        raise ValueError(f"Falta operando para {mnemonic}. Linha {line_num}.")
-                    try:
-                        operand = int(parts[1], 16)
-                    except ValueError:
-                        raise ValueError(f"Operando inválido para {mnemonic}. Esperado hexadecimal. Linha {line_num}.")
-
-                    if not (0 <= operand < MEMORY_SIZE):
-                        raise ValueError(f"Operando {mnemonic} deve ser entre 00 e {MEMORY_SIZE-1:01X}. Linha {line_num}.")
-                elif len(parts) > 1:
-                     raise ValueError(f"Instrução {mnemonic} não aceita operando. Linha {line_num}.")
-                
-                assembled_memory[instruction_ptr] = (opcode << 4) | operand
-                instruction_ptr += 1
-            
-            self.cpu['memory'] = assembled_memory
-            self.cpu['PC'] = 0
-            self.update_visualization()
-            self.status_var.set("Montagem concluída com sucesso!")
-            self.clear_assembly_highlight()
-            return True
-            
-        except Exception as e:
-            self.editor.tag_add("error_line", f"{line_num}.0", f"{line_num}.end")
-            messagebox.showerror("Erro na montagem", f"Erro na linha {line_num}: {str(e)}")
-            self.status_var.set(f"Erro na montagem: linha {line_num}")
+        code = self.editor.get(1.0, tk.END)
+        assembled_memory, errors, source_map = assemble_source(code, self.isa)
+        if errors:
+            for line_num, _ in errors:
+                self.editor.tag_add("error_line", f"{line_num}.0", f"{line_num}.end")
+            details = "\n".join(f"Linha {line_num}: {message}" for line_num, message in errors[:10])
+            if len(errors) > 10:
+                details += f"\n... e mais {len(errors) - 10} erro(s)."
+            self._show_error("Erro na montagem", details)
+            self.status_var.set(f"Erro na montagem: {len(errors)} erro(s), primeiro na linha {errors[0][0]}")
             return False
+
+        self.cpu['memory'] = assembled_memory
+        self.cpu['PC'] = 0
+        self.assembled_source = code
+        self.source_map = source_map
+        if self.disassembly is not None:
+            self.disassembly.set_source(source_map, code.split('\n'))
+        self.update_visualization()
+        self.status_var.set("Montagem concluída com sucesso!")
+        self.clear_assembly_highlight()
+        return True
     
     def run_program(self):
         """
-        Executa o programa em modo contínuo até HLT ou o fim da memória.
+        Executa o programa em modo contínuo até HLT, o fim da memória, o limite de
+        ciclos ou um laço infinito.
         """
-        if self.running:
+        # Uma execução cancelada (Reset) ainda pode estar saindo da sua thread.
+        if self.running or (self._run_thread is not None and self._run_thread.is_alive()):
             return
             
         self.cpu['PC'] = 0
         self.update_visualization()
         self.clear_assembly_highlight()
+        try:
+            limit = max(1, self.cycle_limit.get())
+        except tk.TclError:
+            limit = DEFAULT_CYCLE_LIMIT
+            self.cycle_limit.set(limit)
             
         def run_thread():
             self.running = True
             self.status_var.set("Executando programa...")
+            self.frame_budget.start()
+            self.seen_states.clear()
+            self.stop_reason = None
+            steps = 0
             
-            while self.running and self.cpu['PC'] < MEMORY_SIZE:
-                current_editor_line = 1
-                prog_counter = 0
-                for i, line_content in enumerate(self.editor.get("1.0", tk.END).split('\n')):
-                    stripped_line = line_content.strip()
-                    if stripped_line and not stripped_line.startswith(';'):
-                        if prog_counter == self.cpu['PC']:
-                            self.highlight_assembly_line(i + 1)
-                            break
-                        prog_counter += 1
-                    current_editor_line += 1
-
-                if not self.step():
-                    break
-                time.sleep(0.5 / self.clock_speed)
-            
-            self.running = False
-            self.clear_assembly_highlight()
-            if self.cpu['PC'] >= MEMORY_SIZE:
+            try:
+                while self.running and self.cpu['PC'] < MEMORY_SIZE:
+                    if steps >= limit:
+                        self.stop_reason = STOP_LIMIT
+                        self.status_var.set(f"Limite de {limit} ciclos atingido (execução interrompida)")
+                        break
+                    steps += 1
+                    if self.detect_loop():
+                        break
+
+                    current_editor_line = 1
+                    prog_counter = 0
+                    for i, line_content in enumerate(self.editor.get("1.0", tk.END).split('\n')):
+                        stripped_line = line_content.strip()
+                        if stripped_line and not stripped_line.startswith(';'):
+                            if prog_counter == self.cpu['PC']:
+                                self.highlight_assembly_line(i + 1)
+                                break
+                            prog_counter += 1
+                        current_editor_line += 1
+
+                    if not self.step():
+                        break
+                    self._sleep(0.5 / self.clock_speed)
+            finally:
+                # Mesmo que a execução falhe no meio, o botão Executar volta a funcionar.
+                self.running = False
+                self.flush_output_devices()
+                self.clear_assembly_highlight()
+            if self.stop_reason is None and self.cpu['PC'] >= MEMORY_SIZE:
+                self.stop_reason = STOP_PC
+            # Nas demais paradas (fim da entrada, opcode inválido, limite, laço) a mensagem
+            # de quem interrompeu a execução fica na barra de status.
+            if self.stop_reason == STOP_PC:
                 self.status_var.set("Execução concluída (PC fora do limite de memória)")
-            else:
+            elif self.stop_reason == STOP_HLT:
                 self.status_var.set("Execução concluída (HLT encontrado)")
         
         import threading
-        threading.Thread(target=run_thread).start()
+        self._run_thread = threading.Thread(target=run_thread)
+        self._run_thread.start()
     
+    def state_key(self):
+        """
+        Registradores e flags empacotados num único inteiro (motor_sap.pack_state, o
+        mesmo dos motores rápido e de portas): um hash perfeito do estado da máquina.
+        """
+        cpu = self.cpu
+        return pack_state(cpu['PC'], cpu['MAR'], cpu['IR'], cpu['ACC'], cpu['B'], cpu['output'], cpu['input'],
+                          cpu['flags']['Z'] | cpu['flags']['C'] << 1)
+
+    def detect_loop(self):
+        """
+        Detecção de laço infinito, chamada antes de cada instrução da execução contínua.
+        Se o estado da máquina se repete, o programa repetiria o mesmo trecho para sempre,
+        então a execução para. A memória fica fora do estado porque nenhuma instrução
+        escreve nela, e a leitura de IN esvazia o conjunto de estados (a próxima entrada
+        não faz parte do estado). Retorna True se um laço foi detectado.
+        """
+        key = self.state_key()
+        if key in self.seen_states:
+            self.stop_reason = STOP_LOOP
+            self.status_var.set(f"Laço infinito detectado no PC 0x{self.cpu['PC']:01X}: "
+                                "o estado da máquina se repetiu (execução interrompida)")
+            return True
+        self.seen_states.add(key)
+        return False
+
     def step(self):
         """
         Executa uma única instrução (passo a passo).
         Referência: Ciclo Fetch-Execute (Seção 10.4 e 10.5 do artigo).
         """
+        self.stop_reason = None
         if self.cpu['PC'] >= MEMORY_SIZE:
+            self.stop_reason = STOP_PC
             self.status_var.set("PC fora do limite de memória. Reset necessário.")
             self.running = False
             self.clear_assembly_highlight()
@@ -743,60 +890,312 @@ DB 3     ; Define Byte: Armazena o valor 3 no endereço 0F.
                     break
                 prog_counter += 1
             current_editor_line += 1
-            
-        self.animate_clock()
-        
-        # 1. CICLO DE BUSCA (FETCH) - Estados T1, T2, T3 - Seção 10.4
+
+        if not self.running:
+            self.frame_budget.start()
+
+        if self.gate_mode.get():
+            return self.step_gates()
+
+        # 1. CICLO DE BUSCA (FETCH) - Estados T1, T2, T3 - Seção 10.4 (Fig. 10-3)
+        start = self.trace.now()
+        pc = self.cpu['PC']
+        self.run_states(self.isa.fetch)
+        self.trace.complete("Busca", CAT_INSTRUCTION, start, {"PC": pc})
         
-        # T1: Estado de Endereço (PC -> MAR) - Fig. 10-3a
-        self.status_var.set(f"Busca (Fetch) - T1: PC ({self.cpu['PC']:01X}) -> MAR")
-        self.animate_main_bus_transfer("pc", "mar")
-        self.cpu['MAR'] = self.cpu['PC']
+        # 2. CICLO DE EXECUÇÃO - Estados T4, T5, T6 - Seção 10.5
+        # O byte do IR indexa direto a tabela de decodificação: (instrução, operando).
+        entry = self.isa.decode[self.cpu['IR']]
+        if entry is None:
+            self.stop_reason = STOP_INVALID
+            opcode = self.cpu['IR'] >> self.isa.operand_bits
+            self._show_error("Erro", f"Opcode inválido: {opcode:04b} na instrução 0x{self.cpu['IR']:02X} no endereço 0x{self.cpu['MAR']:01X}.")
+            self.running = False
+            self.clear_assembly_highlight()
+            return False
+
+        instruction, operand = entry
+        self.status_var.set(f"Executando: {instruction.mnemonic} 0x{operand:01X}")
+        start = self.trace.now()
+        halted = self.run_states(instruction.states, instruction, operand)
+        self.trace.complete(instruction.mnemonic, CAT_INSTRUCTION, start, {"IR": self.cpu['IR'], "PC": pc})
         self.update_visualization()
-        time.sleep(0.5 / self.clock_speed)
-        
-        # T2: Estado de Incremento (PC++) - Fig. 10-3b
-        self.status_var.set(f"Busca (Fetch) - T2: Incrementa PC ({self.cpu['PC']:01X} -> {self.cpu['PC']+1:01X})")
-        self.highlight_component("pc")
-        self.cpu['PC'] += 1
+        return not halted
+
+    def run_states(self, states, instruction=None, operand=0):
+        """
+        Executa os roteiros de micro-operações dos estados T (compilados de isa/*.json).
+        Retorna True se alguma micro-operação interrompeu a execução (HLT, fim da entrada).
+        """
+        self._instruction = instruction
+        self._operand = operand
+        label = instruction.mnemonic if instruction else "Busca"
+        first_t = len(self.isa.fetch) + 1 if instruction else 1
+        for t, state in enumerate(states, first_t):
+            start = self.trace.now()
+            for name, args in state:
+                if getattr(self, "_uop_" + name)(*args):
+                    self.trace.complete(f"{label} T{t}", CAT_STATE, start)
+                    return True
+            self.trace.complete(f"{label} T{t}", CAT_STATE, start)
+        return False
+
+    # Micro-operações dos roteiros do conjunto de instruções (isa_sap.MICRO_OPS).
+
+    def _uop_status(self, text):
+        cpu = self.cpu
+        mnemonic = self._instruction.mnemonic if self._instruction else ""
+        text = text.format(operand=self._operand, PC=cpu['PC'], PC_next=cpu['PC'] + 1,
+                           MAR=cpu['MAR'], IR=cpu['IR'], ACC=cpu['ACC'], B=cpu['B'],
+                           Z=cpu['flags']['Z'], C=cpu['flags']['C'], mnemonic=mnemonic)
+        self.status_var.set(text)
+        self.trace.instant(text, CAT_STATUS)
+
+    def _uop_clock(self):
+        self.animate_clock()
+
+    def _uop_highlight(self, component):
+        self.highlight_component(component)
+
+    def _uop_bus(self, source, target):
+        self.animate_main_bus_transfer(source, target)
+
+    def _uop_direct(self, source, target, line):
+        self.animate_direct_transfer(source, target, line)
+
+    def _uop_read(self, target):
+        """Leitura de Memória[MAR]: acende a célula e leva o dado pelo barramento até `target`."""
+        mar = self.cpu['MAR']
+        if 0 <= mar < MEMORY_SIZE:
+            self.canvas.itemconfig(f"mem_{mar}", fill="#ff9999") 
+            self._render()
+            self._sleep(0.2 / self.clock_speed)
+            self.animate_main_bus_transfer("mem_block", target)
+            self.canvas.itemconfig(f"mem_{mar}", fill="#ffff99") 
+
+    def _uop_load(self, register, source):
+        if source == "operand":
+            value = self._operand
+        elif source == "memory":
+            value = self.cpu['memory'][self.cpu['MAR']]
+        elif source == "alu":
+            value = self._alu_result
+        else:
+            value = self.cpu[source]
+        self.cpu[register] = value
+
+    def _uop_increment(self, register):
+        self.cpu[register] += 1
+
+    def _uop_alu(self, operation):
+        """
+        Somador-Subtrator (Seção 10.1): consulta a tabela pré-calculada da ULA para
+        ACC (op) B e atualiza as flags afetadas pela instrução.
+        """
+        result, zero, carry = alu(operation, self.cpu['ACC'], self.cpu['B'])
+        self._alu_result = result
+        flags = self._instruction.flags if self._instruction else ()
+        if "Z" in flags:
+            self.cpu['flags']['Z'] = zero
+        if "C" in flags:
+            self.cpu['flags']['C'] = carry
+        self.canvas.itemconfig("alu_value", text=f"0x{result:02X}", font=('Courier', 12))
+
+    def _uop_clear_alu(self):
+        self.canvas.itemconfig("alu_value", text="")
+
+    def _uop_in(self):
+        """
+        Porta de Entrada -> registrador de entrada. Se ainda não há dados espera por
+        eles; no fim da fonte (ou sem porta conectada) interrompe a execução.
+        """
+        if self.input_port is None:
+            self.stop_reason = STOP_NO_INPUT
+            self._show_error("Erro", "Instrução IN sem porta de entrada conectada.")
+            self.running = False
+            return True
+
+        resets = self._reset_count
+        value = self._read_input_port()
+        if self._reset_count != resets:
+            # Reset enquanto esperava dados: a CPU já foi reiniciada, só encerra a instrução.
+            self.running = False
+            return True
+        if value is None:
+            self.stop_reason = STOP_INPUT_END
+            self._report_input_end()
+            self.running = False
+            self.flush_output_devices()
+            return True
+        self.cpu['input'] = value
+        self.seen_states.clear()
+        return False
+
+    def _uop_out(self):
+        self.write_output_devices(self.cpu['output'])
+
+    def _uop_jump(self, condition):
+        """Desvio (como no SAP-2): operando do IR -> PC se a condição sobre as flags for verdadeira."""
+        if JUMP_CONDITIONS[condition](self.cpu['flags']):
+            self.animate_main_bus_transfer("ir", "pc")
+            self.cpu['PC'] = self._operand
+
+    def _uop_halt(self):
+        self.stop_reason = STOP_HLT
+        self.running = False
+        self.flush_output_devices()
+        return True
+
+    def _uop_refresh(self):
         self.update_visualization()
-        time.sleep(0.5 / self.clock_speed)
-        
-        # T3: Estado de Memória (Memória[MAR] -> IR) - Fig. 10-3c
-        self.status_var.set(f"Busca (Fetch) - T3: Memória[{self.cpu['MAR']:01X}] -> IR")
-        if 0 <= self.cpu['MAR'] < MEMORY_SIZE:
-            self.canvas.itemconfig(f"mem_{self.cpu['MAR']}", fill="#ff9999") 
-            self.canvas.update()
-            time.sleep(0.2 / self.clock_speed)
-            self.animate_main_bus_transfer("mem_block", "ir")
-            self.canvas.itemconfig(f"mem_{self.cpu['MAR']}", fill="#ffff99") 
-        
-        self.cpu['IR'] = self.cpu['memory'][self.cpu['MAR']]
+
+    def _uop_show(self):
         self.update_visualization()
-        time.sleep(0.5 / self.clock_speed)
-        
-        # 2. CICLO DE EXECUÇÃO - Estados T4, T5, T6 - Seção 10.5
-        opcode = self.cpu['IR'] >> 4
-        operand = self.cpu['IR'] & 0x0F
-        
-        if opcode in self.instructions:
-            instr_name, instr_func = self.instructions[opcode]
-            self.status_var.set(f"Executando: {instr_name} 0x{operand:01X}")
-            
-            halted = instr_func(operand)
-            self.update_visualization()
-            return not halted
-        else:
-            messagebox.showerror("Erro", f"Opcode inválido: {opcode:04b} na instrução 0x{self.cpu['IR']:02X} no endereço 0x{self.cpu['MAR']:01X}.")
+        self._sleep(0.5 / self.clock_speed)
+        # "show" encerra o estado T: fecha a medição do orçamento de quadros.
+        self.frame_budget.end_state()
+    
+    # Fios do canvas acionados por cada sinal de controle no Modo Portas.
+    GATE_WIRES = {
+        "Ep": ("pc_to_bus",),
+        "Lm": ("mar_to_bus",),
+        "CE": ("mem_to_bus_main",),
+        "Li": ("ir_to_bus",),
+        "Ei": ("ir_to_bus",),
+        "La": ("acc_to_bus_main",),
+        "Ea": ("acc_to_bus_main",),
+        "Eu": ("alu_to_bus_main", "acc_to_alu_direct", "b_reg_to_alu_direct"),
+        "Lb": ("b_reg_to_bus_main",),
+        "Lo": ("output_to_bus_main",),
+        "Ein": ("input_reg_to_bus_main",),
+        "Lp": ("pc_to_bus",),
+    }
+    BUS_DRIVERS = ("Ep", "CE", "Ei", "Ea", "Eu", "Ein")
+
+    def step_gates(self):
+        """
+        Executa uma instrução no circuito em nível de portas (portas_sap), mostrando no
+        canvas os sinais de controle e os fios ativos de cada estado T.
+        O resultado é conferido com o step() de referência, executado sem animação.
+        """
+        from offscreen_sap import HeadlessEmulator, NullCanvas
+        from dispositivos_sap import InputPort
+        from portas_sap import GateLevelSAP1
+
+        if not self.gates_supported():
+            self.running = False
+            self._show_error("Modo Portas", f"O circuito em nível de portas só implementa o SAP-1, "
+                                            f"não o conjunto de instruções {self.isa.name}.")
+            return False
+
+        before = dict(self.cpu, memory=list(self.cpu['memory']), flags=dict(self.cpu['flags']))
+        machine = GateLevelSAP1(self.cpu['memory'])
+        machine.load_cpu(self.cpu)
+
+        consumed = []
+        def next_input():
+            value = self._read_input_port()
+            if value is None:
+                raise StopIteration
+            consumed.append(value)
+            return value
+
+        resets = self._reset_count
+        stop = machine.step_instruction(next_input if self.input_port else None,
+                                        on_tstate=lambda t, signals: self._show_gate_signals(machine, t, signals))
+        if self._reset_count != resets:
+            # Reset enquanto o IN esperava dados: descarta o estado do circuito.
             self.running = False
+            return False
+        machine.store_cpu(self.cpu)
+        if consumed:
+            self.seen_states.clear()
+        for value in machine.outputs:
+            self.write_output_devices(value)
+        self._show_gate_signals(machine, None, None)
+
+        # Conferência com o step() de referência (um único emulador, reaproveitado a cada passo).
+        if self._gate_reference is None:
+            self._gate_reference = HeadlessEmulator(canvas=NullCanvas(), isa=self.isa)
+        reference = self._gate_reference
+        reference.input_port = InputPort(iter(consumed)) if self.input_port else None
+        reference.cpu = before
+        reference.step()
+        diverged = [name for name in ("PC", "ACC", "MAR", "IR", "B", "output", "input", "flags")
+                    if reference.cpu[name] != self.cpu[name]]
+        if diverged:
+            self._show_error("Divergência no Modo Portas",
+                             "O circuito divergiu do step() de referência em: " + ", ".join(diverged))
+
+        self.stop_reason = stop
+        if stop is None:
+            return True
+        self.running = False
+        self.flush_output_devices()
+        if stop == STOP_HLT:
+            self.status_var.set("Execução interrompida (HLT)")
+        elif stop == STOP_INVALID:
+            self._show_error("Erro", f"Opcode inválido: {self.cpu['IR'] >> 4:04b} na instrução 0x{self.cpu['IR']:02X} no endereço 0x{self.cpu['MAR']:01X}.")
             self.clear_assembly_highlight()
-            return False 
-    
+        elif stop == STOP_NO_INPUT:
+            self._show_error("Erro", "Instrução IN sem porta de entrada conectada.")
+        elif stop == STOP_INPUT_END:
+            self._report_input_end()
+        return False
+
+    def gates_supported(self):
+        """O Modo Portas só existe para o conjunto de instruções do netlist (SAP-1)."""
+        from portas_sap import ISA_NAME
+        return self.isa.name == ISA_NAME
+
+    def _show_gate_signals(self, machine, t_state, signals):
+        """
+        Pinta os fios conforme os sinais de controle do estado T atual e mostra a palavra
+        de controle e o contador em anel. Com signals=None apenas limpa o destaque.
+        """
+        bus_color = "#666666"
+        for tags in self.GATE_WIRES.values():
+            for tag in tags:
+                self.canvas.itemconfig(tag, fill=bus_color, width=2)
+        self.canvas.itemconfig("main_bus", fill=bus_color, width=4)
+        self.canvas.itemconfig("pc", fill="#e6f3ff")
+        if signals is None:
+            self.canvas.itemconfig("con_text", text="")
+            self.canvas.itemconfig("alu_value", text="")
+            self.update_visualization()
+            return
+
+        from portas_sap import CONTROL_SIGNALS
+
+        active = [name for name in CONTROL_SIGNALS if signals[name]]
+        for name in active:
+            for tag in self.GATE_WIRES.get(name, ()):
+                self.canvas.itemconfig(tag, fill="red", width=3)
+        if any(signals[name] for name in self.BUS_DRIVERS):
+            self.canvas.itemconfig("main_bus", fill="red", width=5)
+        if signals["Cp"] or signals["Lp"]:
+            self.canvas.itemconfig("pc", fill="#ff9999")
+        self.canvas.itemconfig("alu_value", text=f"0x{signals['ALU']:02X}" if signals["Eu"] else "")
+
+        ring = f"{machine.regs['T']:06b}"
+        self.canvas.itemconfig("con_text", text=f"T{t_state}  Anel {ring}  W=0x{signals['W']:02X}\nCON: {' '.join(active) or 'NOP'}")
+        self.status_var.set(f"Modo Portas - T{t_state}: {' '.join(active) or 'NOP'}")
+        machine.store_cpu(self.cpu)
+        self.update_visualization()
+        self._render()
+        self._sleep(0.5 / self.clock_speed)
+        self.frame_budget.end_state()
+
     def reset_cpu(self):
         """
         Reseta registradores e memória para o estado inicial.
         """
         self.running = False
+        self._reset_count += 1
+        self.assembled_source = None
+        self.source_map = None
+        if self.disassembly is not None:
+            self.disassembly.set_source([], [])
         self.initialize_cpu()
         self.status_var.set("CPU resetada. Carregue e monte um programa.")
         self.clear_assembly_highlight()
@@ -806,157 +1205,282 @@ DB 3     ; Define Byte: Armazena o valor 3 no endereço 0F.
         self.canvas.itemconfig("alu_value", text="")
 
 
-    def update_speed(self, value):
+    def export_animation(self):
         """
-        Atualiza a velocidade da simulação do clock.
+        Exporta a animação da execução do programa do editor (GIF, MP4, SVG ou quadros),
+        renderizada fora da tela na velocidade de clock atual.
         """
-        self.clock_speed = float(value)
-    
-    # Implementação das instruções básicas do SAP-1 (Macroinstruções) - Seção 10.2
-    
-    def lda(self, operand):
+        path = filedialog.asksaveasfilename(
+            title="Exportar Animação",
+            defaultextension=".gif",
+            filetypes=[("GIF animado", "*.gif"), ("Vídeo MP4", "*.mp4"), ("SVG animado", "*.svg")])
+        if not path:
+            return
+
+        if self.exporting:
+            self.status_var.set("Já há uma exportação em andamento")
+            return
+
+        from dispositivos_sap import read_values
+        from exportador_sap import export_animation, uses_input
+
+        source = self.editor.get("1.0", tk.END)
+        clock_speed = self.clock_speed
+        # A porta conectada é um fluxo que não se repete: a exportação usa valores próprios.
+        inputs = None
+        if uses_input(source, self.isa):
+            text = simpledialog.askstring("Exportar Animação",
+                                          "O programa usa IN. Valores da Porta de Entrada (ex.: 5, 0x10):",
+                                          parent=self.root)
+            if text is None:
+                return
+            try:
+                inputs = list(read_values([text.encode()]))
+            except ValueError as e:
+                self._show_error("Entradas inválidas", str(e))
+                return
+
+        def post(callback, *args):
+            # O Tk só pode ser usado pela thread principal.
+            self.root.after(0, callback, *args)
+
+        def finished(message):
+            self.exporting = False
+            self.status_var.set(message)
+
+        def failed(error):
+            self.exporting = False
+            self._show_error("Erro na exportação", str(error))
+            self.status_var.set("Erro na exportação da animação")
+
+        def export_thread():
+            try:
+                total = export_animation(source, path, clock_speed=clock_speed, isa=self.isa, inputs=inputs,
+                                         progress=lambda message: post(self.status_var.set, message))
+            except Exception as e:
+                post(failed, e)
+                return
+            post(finished, f"Animação exportada: {total} quadros em {path}")
+
+        import threading
+        self.exporting = True
+        self.status_var.set("Exportando animação...")
+        threading.Thread(target=export_thread, daemon=True).start()
+
+    def choose_output_file(self):
         """
-        Instrução LDA (Load Accumulator) - Carrega o Acumulador.
-        Referência: Seção 10.2 (LDA) e Rotina LDA (Seção 10.5, Fig. 10-4, Fig. 10-5).
+        Liga o Registrador de Saída a um arquivo (ou a um pipe nomeado/socket já existente).
+        Cada OUT acrescenta o valor ao final, um por linha.
         """
-        self.status_var.set(f"Execução LDA: Carrega Mem[{operand:01X}] para ACC")
-        # T4: Operando do IR -> MAR
-        self.highlight_component("ir")
-        self.animate_main_bus_transfer("ir", "mar")
-        self.cpu['MAR'] = operand
-        self.update_visualization()
-        time.sleep(0.5 / self.clock_speed)
-        
-        # T5: Memória[MAR] -> ACC
-        self.status_var.set(f"Execução LDA: Memória[{self.cpu['MAR']:01X}] -> ACC")
-        if 0 <= self.cpu['MAR'] < MEMORY_SIZE:
-            self.canvas.itemconfig(f"mem_{self.cpu['MAR']}", fill="#ff9999") 
-            self.canvas.update()
-            time.sleep(0.2 / self.clock_speed)
-            self.animate_main_bus_transfer("mem_block", "acc")
-            self.canvas.itemconfig(f"mem_{self.cpu['MAR']}", fill="#ffff99") 
-        self.cpu['ACC'] = self.cpu['memory'][self.cpu['MAR']]
-        self.update_visualization()
-        time.sleep(0.5 / self.clock_speed)
-        
-        # T6: NOP (No Operation) - Seção 10.5 (Rotina LDA)
-        self.canvas.itemconfig("alu_value", text="")
-        return False
-    
-    def add(self, operand):
+        path = filedialog.asksaveasfilename(title="Saída para Arquivo", defaultextension=".txt",
+                                            confirmoverwrite=False)
+        if not path:
+            return
+        try:
+            device = open_output(path)
+        except OSError as e:
+            self._show_error("Erro no dispositivo de saída", str(e))
+            return
+        if self.output_file_device is not None:
+            self.output_devices.remove(self.output_file_device)
+            try:
+                self.output_file_device.close()
+            except OSError:
+                pass
+        self.output_file_device = device
+        self.output_devices.append(device)
+        self.status_var.set(f"Saída enviada para {path}")
+
+    def choose_input_file(self):
         """
-        Instrução ADD - Soma ao Acumulador.
-        Referência: Seção 10.2 (ADD) e Rotina ADD (Seção 10.5, Fig. 10-6, Fig. 10-7).
+        Conecta a Porta de Entrada a um arquivo ou pipe nomeado com um valor por linha
+        (decimal ou 0x.. hexadecimal). Cada IN consome o próximo valor.
         """
-        self.status_var.set(f"Execução ADD: Soma Mem[{operand:01X}] ao ACC")
-        # T4: Operando do IR -> MAR
-        self.highlight_component("ir")
-        self.animate_main_bus_transfer("ir", "mar")
-        self.cpu['MAR'] = operand
-        self.update_visualization()
-        time.sleep(0.5 / self.clock_speed)
-        
-        # T5: Memória[MAR] -> Reg B
-        self.status_var.set(f"Execução ADD: Memória[{self.cpu['MAR']:01X}] -> Reg B")
-        if 0 <= self.cpu['MAR'] < MEMORY_SIZE:
-            self.canvas.itemconfig(f"mem_{self.cpu['MAR']}", fill="#ff9999") 
-            self.canvas.update()
-            time.sleep(0.2 / self.clock_speed)
-            self.animate_main_bus_transfer("mem_block", "b_reg")
-            self.canvas.itemconfig(f"mem_{self.cpu['MAR']}", fill="#ffff99") 
-        self.cpu['B'] = self.cpu['memory'][self.cpu['MAR']]
+        path = filedialog.askopenfilename(title="Entrada de Arquivo")
+        if not path:
+            return
+        try:
+            port = open_input(path)
+        except OSError as e:
+            self._show_error("Erro na porta de entrada", str(e))
+            return
+        if self.input_port is not None:
+            self.input_port.close()
+        self.input_port = port
         self.update_visualization()
-        time.sleep(0.5 / self.clock_speed)
-        
-        # T6: ACC + Reg B -> ULA -> ACC
-        self.status_var.set("Execução ADD: ACC + Reg B -> ULA -> ACC")
-        self.animate_direct_transfer("acc", "alu", "acc_to_alu_direct")
-        self.animate_direct_transfer("b_reg", "alu", "b_reg_to_alu_direct")
+        self.status_var.set(f"Porta de entrada conectada a {path}")
 
-        alu_result = (self.cpu['ACC'] + self.cpu['B']) & 0xFF
-        self.canvas.itemconfig("alu_value", text=f"0x{alu_result:02X}", font=('Courier', 12))
-        self.highlight_component("alu")
-        self.animate_main_bus_transfer("alu", "acc")
-        
-        self.cpu['ACC'] = alu_result
-        self.update_visualization()
-        time.sleep(0.5 / self.clock_speed)
-        self.canvas.itemconfig("alu_value", text="")
-        
-        return False
-    
-    def sub(self, operand):
+    def open_comparison(self):
         """
-        Instrução SUB - Subtrai do Acumulador.
-        Referência: Seção 10.2 (SUB) e Rotina SUB (Seção 10.5, Fig. 10-6, Fig. 10-7).
+        Abre a comparação lado a lado entre o código do editor e outros programas
+        (ex.: a solução de referência), executados em lockstep na mesma janela.
         """
-        self.status_var.set(f"Execução SUB: Subtrai Mem[{operand:01X}] do ACC")
-        self.highlight_component("ir")
-        self.animate_main_bus_transfer("ir", "mar")
-        self.cpu['MAR'] = operand
-        self.update_visualization()
-        time.sleep(0.5 / self.clock_speed)
-        
-        # T5: Memória[MAR] -> Reg B
-        self.status_var.set(f"Execução SUB: Memória[{self.cpu['MAR']:01X}] -> Reg B")
-        if 0 <= self.cpu['MAR'] < MEMORY_SIZE:
-            self.canvas.itemconfig(f"mem_{self.cpu['MAR']}", fill="#ff9999") 
-            self.canvas.update()
-            time.sleep(0.2 / self.clock_speed)
-            self.animate_main_bus_transfer("mem_block", "b_reg")
-            self.canvas.itemconfig(f"mem_{self.cpu['MAR']}", fill="#ffff99") 
-        self.cpu['B'] = self.cpu['memory'][self.cpu['MAR']]
-        self.update_visualization()
-        time.sleep(0.5 / self.clock_speed)
-        
-        # T6: ACC - Reg B -> ULA -> ACC
-        self.status_var.set("Execução SUB: ACC - Reg B -> ULA -> ACC")
-        self.animate_direct_transfer("acc", "alu", "acc_to_alu_direct")
-        self.animate_direct_transfer("b_reg", "alu", "b_reg_to_alu_direct")
+        from comparacao_sap import ComparisonWindow
 
-        alu_result = (self.cpu['ACC'] - self.cpu['B']) & 0xFF
-        self.canvas.itemconfig("alu_value", text=f"0x{alu_result:02X}", font=('Courier', 12))
-        self.highlight_component("alu")
-        self.animate_main_bus_transfer("alu", "acc")
-        
-        self.cpu['ACC'] = alu_result
-        self.update_visualization()
-        time.sleep(0.5 / self.clock_speed)
-        self.canvas.itemconfig("alu_value", text="")
-        
-        return False
-    
-    def out(self, _):
+        paths = filedialog.askopenfilenames(title="Programas para comparar com o editor",
+                                            filetypes=[("Assembly SAP-1", "*.asm"), ("Todos os arquivos", "*.*")])
+        if not paths:
+            return
+        sources = [("Editor", self.editor.get(1.0, tk.END))]
+        for path in paths:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    sources.append((os.path.basename(path), f.read()))
+            except OSError as e:
+                self._show_error("Erro ao abrir programa", str(e))
+                return
+        ComparisonWindow(self.root, sources, isa=self.isa)
+
+    def save_memory_image(self):
         """
-        Instrução OUT - Saída do Acumulador.
-        Referência: Seção 10.2 (OUT) e Rotina OUT (Seção 10.5, Fig. 10-8, Fig. 10-9).
+        Salva a memória atual como imagem binária, Intel HEX ou JSON (este último
+        com o código-fonte e o mapa de fonte da última montagem).
         """
-        self.status_var.set("Execução OUT: ACC -> Saída")
-        # T4: ACC -> Registrador de Saída
-        self.highlight_component("acc")
-        self.animate_main_bus_transfer("acc", "output_reg")
-        
-        self.cpu['output'] = self.cpu['ACC']
+        from imagem_sap import save_image
+
+        path = filedialog.asksaveasfilename(
+            title="Salvar Imagem de Memória",
+            defaultextension=".json",
+            filetypes=[("Imagem JSON", "*.json"), ("Intel HEX", "*.hex"), ("Binário", "*.bin")])
+        if not path:
+            return
+        try:
+            save_image(path, self.cpu['memory'], source=self.assembled_source,
+                       source_map=self.source_map, metadata={"isa": self.isa.name})
+        except (OSError, ValueError) as e:
+            self._show_error("Erro ao salvar imagem", str(e))
+            return
+        self.status_var.set(f"Imagem de memória salva em {os.path.basename(path)}")
+
+    def load_memory_image(self):
+        """
+        Carrega uma imagem de memória já montada direto na CPU, sem passar pelo montador.
+        Se a imagem trouxer o código-fonte (JSON), ele volta para o editor.
+        """
+        from imagem_sap import load_image, load_into_cpu
+
+        path = filedialog.askopenfilename(
+            title="Carregar Imagem de Memória",
+            filetypes=[("Imagens de memória", "*.json *.hex *.ihx *.bin *.img"), ("Todos os arquivos", "*.*")])
+        if not path:
+            return
+        try:
+            image = load_image(path, MEMORY_SIZE, isa=self.isa.name)
+        except (OSError, ValueError) as e:
+            self._show_error("Erro ao carregar imagem", str(e))
+            return
+
+        self.running = False
+        load_into_cpu(self.cpu, image.memory)
+        self.assembled_source = image.source
+        self.source_map = image.source_map
+        if image.source is not None:
+            self.editor.delete(1.0, tk.END)
+            self.editor.insert(1.0, image.source)
+        if self.disassembly is not None:
+            if image.source is not None and image.source_map:
+                self.disassembly.set_source(image.source_map, image.source.split('\n'))
+            else:
+                self.disassembly.set_source([], [])
+        self.clear_assembly_highlight()
         self.update_visualization()
-        time.sleep(0.5 / self.clock_speed)
-        
-        # T5 e T6: NOP (No Operation) - Seção 10.5 (Rotina OUT)
-        self.canvas.itemconfig("alu_value", text="")
-        return False
+        self.status_var.set(f"Imagem de memória carregada de {os.path.basename(path)}")
+
+    def export_trace(self):
+        """
+        Salva o rastro de eventos da execução no formato Chrome trace-event,
+        que abre no Perfetto (ui.perfetto.dev) ou em chrome://tracing.
+        """
+        path = filedialog.asksaveasfilename(title="Exportar Rastro", defaultextension=".json",
+                                            filetypes=[("Chrome trace (JSON)", "*.json")])
+        if not path:
+            return
+        try:
+            self.trace.save(path)
+        except OSError as e:
+            self._show_error("Erro ao exportar rastro", str(e))
+            return
+        totals = self.trace.summary()
+        self.status_var.set("Rastro salvo: " + ", ".join(
+            f"{category} {seconds:.2f}s" for category, seconds in (
+                ("emulação", totals.get(CAT_EMULATION, 0.0)), ("tk", totals.get(CAT_TK, 0.0)),
+                ("pausas", totals.get(CAT_SLEEP, 0.0)))))
+
+    def write_output_devices(self, value):
+        """Publica um valor de OUT em todos os dispositivos de saída."""
+        for device in list(self.output_devices):
+            try:
+                device.write(value)
+            except OSError as e:
+                self._detach_output_device(device, e)
+
+    def flush_output_devices(self):
+        """Descarrega os buffers dos dispositivos de saída."""
+        for device in list(self.output_devices):
+            try:
+                device.flush()
+            except OSError as e:
+                self._detach_output_device(device, e)
+
+    def close_output_devices(self):
+        """Fecha os dispositivos de saída (ao sair do programa)."""
+        for device in self.output_devices:
+            try:
+                device.close()
+            except OSError:
+                pass
+
+    def _detach_output_device(self, device, error):
+        """
+        Desliga um dispositivo de saída que falhou (o leitor fechou o pipe, o socket
+        caiu) sem interromper a execução; os valores continuam no histórico em memória.
+        """
+        self.output_devices.remove(device)
+        if device is self.output_file_device:
+            self.output_file_device = None
+        try:
+            device.close()
+        except OSError:
+            pass
+        self.status_var.set(f"Dispositivo de saída desconectado: {error}")
+
+    def update_speed(self, value):
+        """
+        Atualiza a velocidade da simulação do clock.
+        """
+        self.clock_speed = float(value)
     
-    def hlt(self, _):
+    def _read_input_port(self):
         """
-        Instrução HLT (Halt) - Parada.
-        Referência: Seção 10.2 (HLT) e HLT (Seção 10.5).
+        Lê o próximo valor da Porta de Entrada, mantendo a janela atualizada enquanto
+        espera. Retorna None no fim dos dados ou se a execução contínua for cancelada.
         """
-        self.status_var.set("Execução interrompida (HLT)")
-        self.highlight_component("ir")
-        self.running = False
-        self.canvas.itemconfig("alu_value", text="")
-        return True
+        resets = self._reset_count
+        with self.frame_budget.waiting():
+            value = self.input_port.read(timeout=0.1)
+            while value is None and not self.input_port.exhausted:
+                if self._reset_count != resets:
+                    return None
+                self.status_var.set("Execução IN: aguardando dados na Porta de Entrada...")
+                self._render()
+                value = self.input_port.read(timeout=0.1)
+        return value
+
+    def _report_input_end(self):
+        """Fim da Porta de Entrada: fim normal dos dados ou erro na fonte (valor inválido)."""
+        if self.input_port.error:
+            self._show_error("Erro na Porta de Entrada", self.input_port.error)
+        else:
+            self.status_var.set("Fim dos dados da Porta de Entrada (execução interrompida)")
 
 # Ponto de entrada principal do programa.
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # Pool de renderização da exportação no executável.
+    import sys
+    # Opcional: nome de um arquivo em isa/ ou caminho de um JSON com outro conjunto de instruções.
+    isa = load_isa(sys.argv[1]) if len(sys.argv) > 1 else None
     root = tk.Tk()
-    app = SAP1Emulator(root)
+    app = SAP1Emulator(root, isa)
     root.mainloop()
+    app.close_output_devices()
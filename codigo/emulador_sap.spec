@@ -5,7 +5,7 @@ a = Analysis(
     ['emulador_sap.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('isa', 'isa')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,361 @@
+"""
+Exportação off-screen das animações do Emulador SAP-1.
+
+Executa o programa em um HeadlessEmulator (mesmo step() e mesmo layout de
+draw_cpu_components da janela), grava a sequência de quadros produzida pelas
+animações dos estados T e a reamostra na taxa de quadros pedida.
+As cenas distintas são renderizadas em paralelo num pool de processos.
+
+Formatos:
+    gif         GIF animado (requer Pillow)
+    mp4         vídeo H.264 (requer Pillow e o executável ffmpeg)
+    svg         um único SVG animado (SMIL), sem dependências
+    svg-frames  diretório com um SVG por quadro
+    png-frames  diretório com um PNG por quadro (requer Pillow)
+
+Uso pela linha de comando:
+    python exportador_sap.py programa.asm aula.gif --fps 30 --velocidade 2 --entradas "5, 7"
+"""
+
+import argparse
+import io
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+
+from dispositivos_sap import InputPort, read_values
+from isa_sap import load_isa
+from montador_sap import assemble_source
+from motor_sap import STOP_INPUT_END, STOP_INVALID, STOP_NO_INPUT
+from offscreen_sap import HeadlessEmulator
+
+FORMATS = ("gif", "mp4", "svg", "svg-frames", "png-frames")
+
+CANVAS_WIDTH = 850
+CANVAS_HEIGHT = 600
+STATUS_HEIGHT = 30  # Faixa inferior com o texto da barra de status.
+BACKGROUND = "#f0f0f0"
+
+_SVG_ANCHORS = {
+    "center": ("middle", "central"),
+    "nw": ("start", "hanging"),
+    "w": ("start", "central"),
+}
+_PIL_ANCHORS = {"center": "mm", "nw": "la", "w": "lm"}
+
+
+def uses_input(source, isa=None):
+    """O programa tem alguma instrução IN? Código com erros de montagem conta como não."""
+    isa = isa or load_isa()
+    memory, errors, source_map = assemble_source(source, isa)
+    if errors:
+        return False
+    for addr, entry in enumerate(source_map):
+        decoded = isa.decode[memory[addr]] if entry and entry[1] == "instr" else None
+        if decoded and any(name == "in" for state in decoded[0].states for name, _ in state):
+            return True
+    return False
+
+
+def record_run(source, clock_speed=1.0, max_steps=10000, isa=None, inputs=None):
+    """
+    Monta e executa o programa sem janela.
+    inputs: valores da Porta de Entrada (None = sem porta conectada).
+    Retorna (linha_do_tempo, duração) onde linha_do_tempo é uma lista de
+    (instante_em_segundos, cena, texto_de_status), um item por canvas.update().
+    Levanta ValueError se a montagem falhar ou a execução parar por erro.
+    """
+    timeline = []
+    port = InputPort(iter(inputs)) if inputs is not None else None
+    emulator = HeadlessEmulator(source, clock_speed=clock_speed, input_port=port, isa=isa,
+                                on_frame=lambda t, scene, status: timeline.append((t, scene, status)))
+    if not emulator.assemble():
+        raise ValueError(emulator.errors[-1])
+    emulator.run(max_steps=max_steps)
+    if emulator.stop_reason in (STOP_NO_INPUT, STOP_INVALID) or (
+            emulator.stop_reason == STOP_INPUT_END and port.error):
+        raise ValueError(emulator.errors[-1])
+    # Mantém o último quadro visível por um instante no fim da animação.
+    return timeline, emulator.clock + 1.0
+
+
+def sample_frames(timeline, fps, duration):
+    """
+    Reamostra a linha do tempo em quadros de 1/fps segundos.
+    Retorna (cenas_unicas, quadros) onde quadros[k] é o índice em cenas_unicas
+    do que estava na tela no instante k/fps.
+    """
+    scenes = []
+    index_of = {}
+    frames = []
+    current = None
+    pos = 0
+    total = max(1, int(duration * fps))
+    for k in range(total):
+        t = k / fps
+        while pos < len(timeline) and timeline[pos][0] <= t:
+            key = (timeline[pos][1], timeline[pos][2])
+            if key not in index_of:
+                index_of[key] = len(scenes)
+                scenes.append(key)
+            current = index_of[key]
+            pos += 1
+        frames.append(current if current is not None else 0)
+    if not scenes:
+        raise ValueError("Nenhum quadro foi gerado.")
+    return scenes, frames
+
+
+def _runs(frames):
+    """Agrupa quadros consecutivos iguais em (índice_da_cena, quadro_inicial, quantidade)."""
+    runs = []
+    for k, scene in enumerate(frames):
+        if runs and runs[-1][0] == scene:
+            runs[-1][2] += 1
+        else:
+            runs.append([scene, k, 1])
+    return runs
+
+
+def _font(font):
+    family = font[0] if len(font) > 0 else "Arial"
+    size = int(font[1]) if len(font) > 1 else 10
+    bold = len(font) > 2 and "bold" in font[2:]
+    # Tamanhos de fonte do Tk são em pontos.
+    return family, size * 96 / 72, bold
+
+
+def render_svg(scene, status, standalone=True):
+    """Desenha uma cena gravada pelo RecordingCanvas como SVG."""
+    out = []
+    if standalone:
+        out.append(f'<svg xmlns="http://www.w3.org/2000/svg" width="{CANVAS_WIDTH}" '
+                   f'height="{CANVAS_HEIGHT + STATUS_HEIGHT}">')
+    out.append(f'<rect width="{CANVAS_WIDTH}" height="{CANVAS_HEIGHT + STATUS_HEIGHT}" fill="{BACKGROUND}"/>')
+    for kind, coords, options in scene:
+        opts = dict(options)
+        fill = opts.get("fill") or "none"
+        if kind in ("rectangle", "oval"):
+            x1, y1, x2, y2 = coords
+            width = opts.get("width", 1)
+            stroke = opts.get("outline") if width and opts.get("outline") else "none"
+            if kind == "rectangle":
+                out.append(f'<rect x="{x1}" y="{y1}" width="{x2 - x1}" height="{y2 - y1}" '
+                           f'fill="{fill}" stroke="{stroke}" stroke-width="{width}"/>')
+            else:
+                out.append(f'<ellipse cx="{(x1 + x2) / 2}" cy="{(y1 + y2) / 2}" rx="{(x2 - x1) / 2}" '
+                           f'ry="{(y2 - y1) / 2}" fill="{fill}" stroke="{stroke}" stroke-width="{width}"/>')
+        elif kind == "line":
+            points = " ".join(f"{coords[i]},{coords[i + 1]}" for i in range(0, len(coords), 2))
+            out.append(f'<polyline points="{points}" fill="none" stroke="{fill}" '
+                       f'stroke-width="{opts.get("width", 1)}"/>')
+        elif kind == "text" and opts.get("text"):
+            family, size, bold = _font(opts.get("font", ()))
+            anchor, baseline = _SVG_ANCHORS.get(opts.get("anchor", "center"), _SVG_ANCHORS["center"])
+            weight = ' font-weight="bold"' if bold else ""
+            out.append(f'<text x="{coords[0]}" y="{coords[1]}" fill="{fill}" font-family="{family}" '
+                       f'font-size="{size:.1f}"{weight} text-anchor="{anchor}" dominant-baseline="{baseline}">'
+                       f'{escape(str(opts["text"]))}</text>')
+    out.append(f'<rect y="{CANVAS_HEIGHT}" width="{CANVAS_WIDTH}" height="{STATUS_HEIGHT}" fill="#e0e0e0"/>')
+    out.append(f'<text x="8" y="{CANVAS_HEIGHT + STATUS_HEIGHT / 2}" font-family="Arial" font-size="13.3" '
+               f'dominant-baseline="central">{escape(status)}</text>')
+    if standalone:
+        out.append("</svg>")
+    return "\n".join(out)
+
+
+_pil_fonts = {}
+
+
+def _pil_font(font):
+    from PIL import ImageFont
+
+    family, size, bold = _font(font)
+    key = (size, bold)
+    if key not in _pil_fonts:
+        name = "DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf"
+        try:
+            _pil_fonts[key] = ImageFont.truetype(name, int(size))
+        except OSError:
+            _pil_fonts[key] = ImageFont.load_default()
+    return _pil_fonts[key]
+
+
+def render_png(scene, status):
+    """Desenha uma cena como PNG (bytes) usando Pillow."""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (CANVAS_WIDTH, CANVAS_HEIGHT + STATUS_HEIGHT), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    for kind, coords, options in scene:
+        opts = dict(options)
+        fill = opts.get("fill") or None
+        if kind in ("rectangle", "oval"):
+            width = int(opts.get("width", 1))
+            outline = opts.get("outline") if width else None
+            shape = draw.rectangle if kind == "rectangle" else draw.ellipse
+            shape(coords, fill=fill, outline=outline or None, width=max(width, 1))
+        elif kind == "line":
+            draw.line(coords, fill=fill, width=int(opts.get("width", 1)))
+        elif kind == "text" and opts.get("text"):
+            anchor = _PIL_ANCHORS.get(opts.get("anchor", "center"), "mm")
+            draw.text(coords[:2], str(opts["text"]), fill=fill, font=_pil_font(opts.get("font", ())),
+                      anchor=anchor)
+    draw.rectangle((0, CANVAS_HEIGHT, CANVAS_WIDTH, CANVAS_HEIGHT + STATUS_HEIGHT), fill="#e0e0e0")
+    draw.text((8, CANVAS_HEIGHT + STATUS_HEIGHT / 2), status, fill="black",
+              font=_pil_font(("Arial", 10)), anchor="lm")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _render_job(job):
+    """Função executada pelos processos do pool (precisa estar no nível do módulo)."""
+    raster, (scene, status) = job
+    return render_png(scene, status) if raster else render_svg(scene, status)
+
+
+def render_scenes(scenes, raster, workers=None):
+    """Renderiza as cenas únicas, em paralelo quando houver mais de um processo."""
+    jobs = [(raster, scene) for scene in scenes]
+    if workers == 1 or len(jobs) < 2:
+        return [_render_job(job) for job in jobs]
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, len(jobs) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render_job, jobs, chunksize=chunk))
+
+
+def _write_animated_svg(path, scenes, frames, fps):
+    runs = _runs(frames)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{CANVAS_WIDTH}" '
+                f'height="{CANVAS_HEIGHT + STATUS_HEIGHT}">\n')
+        for index, scene in enumerate(scenes):
+            scene_runs = [(start, count) for i, start, count in runs if i == index]
+            if not scene_runs:
+                continue
+            f.write('<g visibility="hidden">\n')
+            for start, count in scene_runs:
+                last = start + count == len(frames)
+                f.write(f'<set attributeName="visibility" to="visible" begin="{start / fps:.3f}s" '
+                        f'dur="{count / fps:.3f}s" fill="{"freeze" if last else "remove"}"/>\n')
+            f.write(render_svg(*scene, standalone=False))
+            f.write("\n</g>\n")
+        f.write("</svg>\n")
+
+
+def _write_gif(path, images, frames, fps):
+    from PIL import Image
+
+    pictures = []
+    durations = []
+    for index, _, count in _runs(frames):
+        pictures.append(Image.open(io.BytesIO(images[index])).convert("P", palette=Image.ADAPTIVE))
+        durations.append(max(20, round(1000 * count / fps)))
+    pictures[0].save(path, save_all=True, append_images=pictures[1:], duration=durations, loop=0)
+
+
+def _write_mp4(path, images, frames, fps):
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("Exportação em MP4 requer o ffmpeg instalado no PATH.")
+    command = [ffmpeg, "-y", "-loglevel", "error", "-f", "image2pipe", "-framerate", str(fps),
+               "-i", "-", "-c:v", "libx264", "-pix_fmt", "yuv420p", path]
+    with subprocess.Popen(command, stdin=subprocess.PIPE) as process:
+        for index in frames:
+            process.stdin.write(images[index])
+        process.stdin.close()
+        if process.wait() != 0:
+            raise RuntimeError("O ffmpeg falhou ao gerar o vídeo.")
+
+
+def _require_pillow(fmt):
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        raise RuntimeError(f"O formato {fmt} requer o Pillow (pip install pillow).") from None
+
+
+def _guess_format(path):
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    return extension if extension in ("gif", "mp4", "svg") else "svg-frames"
+
+
+def export_animation(source, path, fps=30, clock_speed=1.0, fmt=None, workers=None, progress=None,
+                     isa=None, inputs=None):
+    """
+    Exporta a animação completa da execução de `source` (código Assembly).
+    progress: chamado com uma mensagem no início de cada etapa.
+    isa / inputs: conjunto de instruções e valores da Porta de Entrada (ver record_run).
+    Retorna o número de quadros gerados.
+    """
+    fmt = fmt or _guess_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato desconhecido: {fmt}. Use um de {', '.join(FORMATS)}.")
+    if fps <= 0:
+        raise ValueError(f"A taxa de quadros deve ser positiva (fps={fps}).")
+    progress = progress or (lambda message: None)
+
+    progress("Exportando animação: executando o programa...")
+    timeline, duration = record_run(source, clock_speed=clock_speed, isa=isa, inputs=inputs)
+    scenes, frames = sample_frames(timeline, fps, duration)
+
+    if fmt == "svg":
+        progress(f"Exportando animação: gravando {len(frames)} quadros...")
+        _write_animated_svg(path, scenes, frames, fps)
+        return len(frames)
+
+    raster = fmt != "svg-frames"
+    if raster:
+        _require_pillow(fmt)
+    progress(f"Exportando animação: desenhando {len(scenes)} cenas...")
+    images = render_scenes(scenes, raster=raster, workers=workers)
+    progress(f"Exportando animação: gravando {len(frames)} quadros...")
+    if fmt == "gif":
+        _write_gif(path, images, frames, fps)
+    elif fmt == "mp4":
+        _write_mp4(path, images, frames, fps)
+    else:
+        os.makedirs(path, exist_ok=True)
+        extension = "svg" if fmt == "svg-frames" else "png"
+        for k, index in enumerate(frames):
+            mode = "w" if extension == "svg" else "wb"
+            with open(os.path.join(path, f"frame_{k:05d}.{extension}"), mode) as f:
+                f.write(images[index])
+    return len(frames)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta a animação de um programa SAP-1 sem abrir a janela.")
+    parser.add_argument("programa", help="arquivo com o código Assembly")
+    parser.add_argument("saida", help="arquivo (.gif, .mp4, .svg) ou diretório de quadros")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--velocidade", type=float, default=1.0, help="velocidade do clock (como no controle da janela)")
+    parser.add_argument("--formato", choices=FORMATS)
+    parser.add_argument("--processos", type=int, default=None, help="tamanho do pool de renderização")
+    parser.add_argument("--entradas", default=None, help="valores da Porta de Entrada (ex.: \"5, 0x10\")")
+    parser.add_argument("--isa", default="sap1", help="conjunto de instruções (nome em isa/ ou arquivo JSON)")
+    args = parser.parse_args(argv)
+
+    inputs = None
+    if args.entradas is not None:
+        try:
+            inputs = list(read_values([args.entradas.encode()]))
+        except ValueError as e:
+            parser.error(f"--entradas: {e}")
+    with open(args.programa, encoding="utf-8") as f:
+        source = f.read()
+    try:
+        total = export_animation(source, args.saida, fps=args.fps, clock_speed=args.velocidade,
+                                 fmt=args.formato, workers=args.processos, isa=load_isa(args.isa),
+                                 inputs=inputs)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"{total} quadros exportados para {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Fuzzer diferencial do Emulador SAP-1.
+
+Gera imagens de memória aleatórias e programas Assembly válidos, executa cada
+caso na semântica de referência (o próprio SAP1Emulator.step(), rodando sem
+janela) e nos motores acelerados, e compara o estado final da CPU, a
+sequência de saídas e o número de instruções. Um caso divergente é reduzido
+até um programa mínimo que ainda diverge.
+
+Uso:
+    python fuzzer_sap.py --casos 1000000 --processos 8
+    python fuzzer_sap.py --segundos 60 --motor rapido
+"""
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from dispositivos_sap import InputPort
+from isa_sap import load_isa
+from montador_sap import MEMORY_SIZE
+from motor_sap import run_fast
+from offscreen_sap import HeadlessEmulator, NullCanvas
+from portas_sap import run_gates
+
+# Campos comparados entre a referência e os motores.
+COMPARED = ("PC", "ACC", "MAR", "IR", "B", "output", "input", "flags", "memory", "outputs", "steps")
+
+MAX_STEPS = 64
+
+# Motores acelerados que podem ser verificados: nome -> função(memória, entradas) -> estado.
+ENGINES = {
+    "rapido": lambda memory, inputs: run_fast(memory, inputs, max_steps=MAX_STEPS),
+    "portas": lambda memory, inputs: run_gates(memory, inputs, max_steps=MAX_STEPS),
+}
+
+# Mnemônicos usados na geração de código-fonte: (mnemônico, opcode, tem_operando).
+# Os motores acelerados implementam o SAP-1, então o fuzzer usa sempre isa/sap1.json.
+MNEMONICS = tuple((i.mnemonic, i.opcode, i.operand != "none") for i in load_isa("sap1").instructions)
+VALID_OPCODES = tuple(op for _, op, _ in MNEMONICS)
+
+
+def run_reference(memory, inputs):
+    """Executa o caso com o step() do emulador (sem Tk e sem pausas)."""
+    port = InputPort(iter(inputs)) if inputs is not None else None
+    emulator = HeadlessEmulator(canvas=NullCanvas(), input_port=port)
+    emulator.cpu['memory'] = list(memory)
+    steps = emulator.run(max_steps=MAX_STEPS)
+    result = dict(emulator.cpu)
+    result.update(steps=steps, outputs=emulator.output_history.values())
+    return result
+
+
+def assemble(source):
+    """Monta o código com o montador do emulador. Retorna a memória ou None se houver erro."""
+    emulator = HeadlessEmulator(source, canvas=NullCanvas())
+    return list(emulator.cpu['memory']) if emulator.assemble() else None
+
+
+def compare(memory, inputs, engine):
+    """Retorna a lista de campos em que o motor diverge da referência (vazia se iguais)."""
+    expected = run_reference(memory, inputs)
+    got = ENGINES[engine](memory, inputs)
+    return [field for field in COMPARED if expected[field] != got[field]]
+
+
+def random_memory(rng):
+    """Imagem de memória aleatória, com maioria de opcodes válidos para chegar mais longe."""
+    memory = []
+    for _ in range(MEMORY_SIZE):
+        roll = rng.random()
+        if roll < 0.7:
+            opcode = rng.choice(VALID_OPCODES)
+            memory.append((opcode << 4) | rng.randrange(16))
+        elif roll < 0.8:
+            memory.append(rng.choice((0x00, 0xFF, 0x7F, 0x80)))
+        else:
+            memory.append(rng.randrange(256))
+    return memory
+
+
+def random_source(rng):
+    """Programa Assembly válido: instruções, comentários e uma área de dados com ORG/DB."""
+    lines = []
+    size = rng.randint(1, MEMORY_SIZE)
+    for _ in range(size):
+        mnemonic, _, has_operand = rng.choice(MNEMONICS)
+        if rng.random() < 0.2:
+            mnemonic = mnemonic.lower()
+        line = f"{mnemonic} {rng.randrange(MEMORY_SIZE):02X}" if has_operand else mnemonic
+        if rng.random() < 0.2:
+            line += "   ; comentário"
+        lines.append(line)
+        if rng.random() < 0.1:
+            lines.append(rng.choice(("", "; linha de comentário")))
+    if rng.random() < 0.8:
+        start = rng.randrange(MEMORY_SIZE)
+        lines.append(f"ORG {start:02X}")
+        for _ in range(rng.randint(1, MEMORY_SIZE - start)):
+            lines.append(f"DB {rng.randrange(256)}")
+    return "\n".join(lines) + "\n"
+
+
+def random_inputs(rng):
+    if rng.random() < 0.1:
+        return None
+    return [rng.randrange(256) for _ in range(rng.randint(0, 6))]
+
+
+def _cell_cost(value):
+    """Ordem de simplicidade das células: 00 < HLT < qualquer outro valor."""
+    return {0x00: 0, 0xF0: 1}.get(value, 2 + value)
+
+
+def shrink_memory(memory, inputs, engine):
+    """
+    Reduz um caso divergente: troca células por 00, HLT ou só o opcode e remove
+    entradas enquanto a divergência persistir. Cada troca deixa o caso
+    estritamente mais simples, então o processo sempre termina.
+    """
+    memory = list(memory)
+    inputs = None if inputs is None else list(inputs)
+
+    changed = True
+    while changed:
+        changed = False
+        for i in range(MEMORY_SIZE):
+            for value in (0x00, 0xF0, memory[i] & 0xF0):
+                if _cell_cost(value) < _cell_cost(memory[i]):
+                    candidate = memory[:i] + [value] + memory[i + 1:]
+                    if compare(candidate, inputs, engine):
+                        memory = candidate
+                        changed = True
+                        break
+        if inputs:
+            for candidate in (inputs[:-1], [0] * len(inputs)):
+                if candidate != inputs and compare(memory, candidate, engine):
+                    inputs = candidate
+                    changed = True
+                    break
+    return memory, inputs
+
+
+def shrink_source(source, inputs, engine):
+    """Remove linhas do programa enquanto ele continuar montando e divergindo."""
+    lines = source.splitlines()
+    i = 0
+    while i < len(lines):
+        candidate = lines[:i] + lines[i + 1:]
+        memory = assemble("\n".join(candidate))
+        if memory is not None and compare(memory, inputs, engine):
+            lines = candidate
+        else:
+            i += 1
+    return "\n".join(lines) + "\n"
+
+
+def format_case(memory, inputs):
+    image = " ".join(f"{value:02X}" for value in memory)
+    return f"memória: {image}\nentradas: {inputs}"
+
+
+def fuzz_batch(seed, cases, engine, deadline=None):
+    """
+    Executa `cases` casos a partir de `seed`. Metade dos casos é uma imagem de
+    memória aleatória e metade um programa Assembly válido. Com `deadline`
+    (instante de time.monotonic()) o lote para assim que o prazo acaba.
+    Retorna (casos executados, lista de divergências já reduzidas, como texto).
+    """
+    rng = random.Random(seed)
+    failures = []
+    for n in range(cases):
+        if deadline is not None and time.monotonic() >= deadline:
+            return n, failures
+        inputs = random_inputs(rng)
+        if n % 2:
+            memory = random_memory(rng)
+            fields = compare(memory, inputs, engine)
+            if fields:
+                memory, inputs = shrink_memory(memory, inputs, engine)
+                failures.append(f"[{engine}] divergência em {', '.join(fields)}\n{format_case(memory, inputs)}")
+        else:
+            source = random_source(rng)
+            memory = assemble(source)
+            if memory is None:
+                failures.append(f"[gerador] código gerado não montou:\n{source}")
+                continue
+            fields = compare(memory, inputs, engine)
+            if fields:
+                source = shrink_source(source, inputs, engine)
+                failures.append(f"[{engine}] divergência em {', '.join(fields)}\n"
+                                f"código:\n{source}{format_case(assemble(source), inputs)}")
+    return cases, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fuzzer diferencial: motores acelerados x step() de referência.")
+    parser.add_argument("--casos", type=int, default=100_000)
+    parser.add_argument("--segundos", type=float, default=None, help="roda por tempo em vez de número de casos")
+    parser.add_argument("--motor", choices=sorted(ENGINES), action="append",
+                        help="motor a verificar (pode repetir; padrão: todos)")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--semente", type=int, default=None)
+    parser.add_argument("--lote", type=int, default=2000, help="casos por tarefa enviada ao pool")
+    args = parser.parse_args(argv)
+
+    engines = args.motor or sorted(ENGINES)
+    seed = args.semente if args.semente is not None else random.randrange(2**32)
+    deadline = time.monotonic() + args.segundos if args.segundos else None
+    print(f"Semente: {seed} | motores: {', '.join(engines)} | processos: {args.processos}")
+
+    start = time.monotonic()
+    executed = 0   # casos concluídos, somando todos os motores
+    submitted = 0  # casos por motor já enviados ao pool
+    failures = []
+    batch = 0
+    pending = set()
+    with ProcessPoolExecutor(max_workers=args.processos) as pool:
+        while True:
+            # Mantém até dois lotes por processo em andamento; cada lote concluído abre vaga para outro.
+            while not failures and len(pending) < args.processos * 2:
+                if deadline is not None:
+                    if time.monotonic() >= deadline:
+                        break
+                    size = args.lote
+                else:
+                    size = min(args.lote, args.casos - submitted)
+                    if size <= 0:
+                        break
+                for engine in engines:
+                    pending.add(pool.submit(fuzz_batch, seed + batch, size, engine, deadline))
+                submitted += size
+                batch += 1
+            if not pending:
+                break
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for job in done:
+                cases, found = job.result()
+                executed += cases
+                failures.extend(found)
+            if failures or (deadline is not None and time.monotonic() >= deadline):
+                # Lotes ainda na fila são cancelados; os que já rodam param no prazo.
+                for job in pending:
+                    job.cancel()
+                for job in pending:
+                    if not job.cancelled():
+                        cases, found = job.result()
+                        executed += cases
+                        failures.extend(found)
+                break
+
+    elapsed = time.monotonic() - start
+    rate = executed / elapsed if elapsed else 0
+    print(f"{executed // len(engines)} casos por motor em {elapsed:.1f}s "
+          f"({rate:,.0f} casos/s, ~{rate * 3600:,.0f} casos/hora)")
+    for failure in failures[:10]:
+        print("\n" + failure)
+    if failures:
+        raise SystemExit(1)
+    print("Nenhuma divergência encontrada.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Imagens de memória do SAP-1: leitura e gravação em binário bruto, Intel HEX e JSON.
+
+    .bin / .img   bytes da memória, do endereço 0 em diante;
+    .hex / .ihx   Intel HEX (registros de dados, endereço linear estendido e fim);
+    .json         envelope com metadados, a memória em hexadecimal, o código-fonte
+                  e o mapa de fonte (endereço -> linha) gerado pelo montador.
+
+A memória é montada num bytearray e preenchida por cópias de buffer (readinto,
+atribuição de fatias, bytes.fromhex), sem laços byte a byte em Python, então
+imagens de memórias maiores e lotes grandes carregam direto na CPU.
+"""
+
+import datetime
+import json
+import os
+from collections import namedtuple
+
+from montador_sap import MEMORY_SIZE
+
+FORMATS = {
+    ".bin": "bin", ".img": "bin",
+    ".hex": "hex", ".ihx": "hex",
+    ".json": "json",
+}
+JSON_FORMAT = "sap-memoria"
+JSON_VERSION = 1
+HEX_RECORD_SIZE = 16
+
+# memory: bytearray com exatamente `size` bytes.
+# metadata: dicionário (vazio para binário e Intel HEX).
+# source / source_map: código-fonte e mapa de fonte, se a imagem os trouxer.
+MemoryImage = namedtuple("MemoryImage", "memory metadata source source_map")
+
+
+def image_format(path, fmt=None):
+    """Formato pelo parâmetro ou pela extensão do arquivo."""
+    fmt = fmt or FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt not in ("bin", "hex", "json"):
+        raise ValueError(f"Formato de imagem desconhecido: {path}. Use .bin, .hex ou .json.")
+    return fmt
+
+
+def _check_size(end, size):
+    if end > size:
+        raise ValueError(f"A imagem não cabe na memória ({end} bytes, máximo {size}).")
+
+
+# --------------------------------------------------------------------------
+# Leitura
+# --------------------------------------------------------------------------
+
+def read_bin(stream, size=MEMORY_SIZE):
+    memory = bytearray(size)
+    stream.readinto(memoryview(memory))
+    if stream.read(1):
+        raise ValueError(f"A imagem não cabe na memória (mais de {size} bytes).")
+    return MemoryImage(memory, {}, None, None)
+
+
+def read_hex(stream, size=MEMORY_SIZE):
+    memory = bytearray(size)
+    base = 0
+    for line_num, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith(b":"):
+            raise ValueError(f"Intel HEX, linha {line_num}: registro sem ':'.")
+        try:
+            record = bytes.fromhex(line[1:].decode("ascii"))
+        except ValueError:
+            raise ValueError(f"Intel HEX, linha {line_num}: caracteres inválidos.") from None
+        if len(record) < 5 or len(record) != record[0] + 5:
+            raise ValueError(f"Intel HEX, linha {line_num}: tamanho do registro inválido.")
+        if sum(record) & 0xFF:
+            raise ValueError(f"Intel HEX, linha {line_num}: checksum inválido.")
+        count, kind = record[0], record[3]
+        addr = base + int.from_bytes(record[1:3], "big")
+        data = record[4:4 + count]
+        if kind == 0x00:
+            _check_size(addr + count, size)
+            memory[addr:addr + count] = data
+        elif kind == 0x01:
+            break
+        elif kind == 0x02:
+            base = int.from_bytes(data, "big") << 4
+        elif kind == 0x04:
+            base = int.from_bytes(data, "big") << 16
+        # Registros 03 e 05 (endereço de início) não se aplicam ao SAP-1: PC começa em 0.
+    return MemoryImage(memory, {}, None, None)
+
+
+def _source_map_entry(entry):
+    """Entrada do mapa de fonte: None ou [linha, "instr" | "db"]."""
+    if entry is None:
+        return None
+    if (not isinstance(entry, list) or len(entry) != 2 or not isinstance(entry[0], int)
+            or entry[0] < 1 or entry[1] not in ("instr", "db")):
+        raise ValueError(f"Imagem JSON: entrada inválida no mapa de fonte: {entry!r}.")
+    return tuple(entry)
+
+
+def read_json(stream, size=MEMORY_SIZE, isa=None):
+    """
+    Lê o envelope JSON, validando campos obrigatórios, tipos e tamanho.
+    Com `isa` (nome do conjunto de instruções carregado), recusa imagens de outra ISA.
+    """
+    envelope = json.load(stream)
+    if not isinstance(envelope, dict) or envelope.get("format") != JSON_FORMAT:
+        raise ValueError(f"JSON não é uma imagem de memória ({JSON_FORMAT}).")
+    version = envelope.get("version", JSON_VERSION)
+    if not isinstance(version, int) or version > JSON_VERSION:
+        raise ValueError(f"Imagem JSON: versão não suportada: {version!r}.")
+    for key in ("memory", "size"):
+        if key not in envelope:
+            raise ValueError(f"Imagem JSON sem o campo obrigatório \"{key}\".")
+    if not isinstance(envelope["memory"], str):
+        raise ValueError("Imagem JSON: \"memory\" deve ser um texto hexadecimal.")
+    try:
+        data = bytes.fromhex(envelope["memory"])
+    except ValueError:
+        raise ValueError("Imagem JSON: \"memory\" contém caracteres que não são hexadecimais.") from None
+    declared = envelope["size"]
+    if not isinstance(declared, int) or declared != len(data):
+        raise ValueError(f"Imagem JSON: \"size\" ({declared!r}) difere do tamanho da memória ({len(data)} bytes).")
+    _check_size(len(data), size)
+
+    metadata = envelope.get("metadata", {})
+    if not isinstance(metadata, dict):
+        raise ValueError("Imagem JSON: \"metadata\" deve ser um objeto.")
+    if isa is not None and metadata.get("isa", isa) != isa:
+        raise ValueError(f"Imagem gerada para o conjunto de instruções {metadata['isa']!r}, "
+                         f"mas o carregado é {isa!r}.")
+    source = envelope.get("source")
+    if source is not None and not isinstance(source, str):
+        raise ValueError("Imagem JSON: \"source\" deve ser um texto.")
+    source_map = envelope.get("source_map")
+    if source_map is not None:
+        if not isinstance(source_map, list):
+            raise ValueError("Imagem JSON: \"source_map\" deve ser uma lista.")
+        source_map = [_source_map_entry(entry) for entry in source_map]
+
+    memory = bytearray(size)
+    memory[:len(data)] = data
+    return MemoryImage(memory, metadata, source, source_map)
+
+
+READERS = {"bin": read_bin, "hex": read_hex, "json": read_json}
+
+
+def load_image(path, size=MEMORY_SIZE, fmt=None, isa=None):
+    """
+    Lê uma imagem de memória. Retorna um MemoryImage.
+    isa: nome do conjunto de instruções carregado, conferido nas imagens JSON.
+    """
+    fmt = image_format(path, fmt)
+    if fmt == "json":
+        with open(path, encoding="utf-8") as stream:
+            return read_json(stream, size, isa)
+    with open(path, "rb") as stream:
+        return READERS[fmt](stream, size)
+
+
+def iter_raw_images(path, size=MEMORY_SIZE):
+    """
+    Percorre um arquivo binário com várias imagens concatenadas de `size` bytes.
+    O arquivo é lido de uma vez e cada imagem é uma fatia (memoryview), sem cópia.
+    """
+    with open(path, "rb") as stream:
+        data = memoryview(stream.read())
+    if len(data) % size:
+        raise ValueError(f"Tamanho ({len(data)} bytes) não é múltiplo de {size}.")
+    for offset in range(0, len(data), size):
+        yield data[offset:offset + size]
+
+
+def load_into_cpu(cpu, memory):
+    """Copia a imagem para a memória da CPU e volta o PC a 0 (cópia feita em C)."""
+    cpu['memory'][:] = memory
+    cpu['PC'] = 0
+
+
+# --------------------------------------------------------------------------
+# Gravação
+# --------------------------------------------------------------------------
+
+def _hex_record(kind, addr, data=b""):
+    record = bytes((len(data), (addr >> 8) & 0xFF, addr & 0xFF, kind)) + bytes(data)
+    checksum = (-sum(record)) & 0xFF
+    return ":" + (record + bytes((checksum,))).hex().upper() + "\n"
+
+
+def format_hex(memory):
+    """Texto Intel HEX com registros de 16 bytes."""
+    memory = bytes(memory)
+    lines = []
+    upper = 0
+    for addr in range(0, len(memory), HEX_RECORD_SIZE):
+        if addr >> 16 != upper:
+            upper = addr >> 16
+            lines.append(_hex_record(0x04, 0, upper.to_bytes(2, "big")))
+        lines.append(_hex_record(0x00, addr & 0xFFFF, memory[addr:addr + HEX_RECORD_SIZE]))
+    lines.append(_hex_record(0x01, 0))
+    return "".join(lines)
+
+
+def format_json(memory, source=None, source_map=None, metadata=None):
+    envelope = {
+        "format": JSON_FORMAT,
+        "version": JSON_VERSION,
+        "size": len(memory),
+        "metadata": {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            **(metadata or {}),
+        },
+        "memory": bytes(memory).hex(" ").upper(),
+    }
+    if source is not None:
+        envelope["source"] = source
+    if source_map is not None:
+        envelope["source_map"] = [list(entry) if entry else None for entry in source_map]
+    return json.dumps(envelope, ensure_ascii=False, indent=2) + "\n"
+
+
+def save_image(path, memory, fmt=None, source=None, source_map=None, metadata=None):
+    """
+    Grava a memória em `path`. Código-fonte, mapa de fonte e metadados só são
+    guardados no formato JSON.
+    """
+    fmt = image_format(path, fmt)
+    if fmt == "bin":
+        with open(path, "wb") as f:
+            f.write(bytes(memory))
+    elif fmt == "hex":
+        with open(path, "w", encoding="ascii") as f:
+            f.write(format_hex(memory))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(format_json(memory, source, source_map, metadata))
@@ -0,0 +1,186 @@
+"""
+Conjunto de instruções declarativo.
+
+O conjunto de instruções (mnemônico, opcode, tipo de operando, micro-operações
+de cada estado T e flags afetadas) fica num arquivo JSON em isa/. Ao carregar,
+ele é compilado em:
+    decode             lista de 256 posições: byte -> (Instrução, operando) ou None,
+                       para decodificar o IR com um único índice;
+    opcodes /          tabelas do montador (mnemônico -> opcode e mnemônicos
+    operand_mnemonics  que exigem operando);
+    fetch / states     roteiros de animação: tuplas de (micro-operação, argumentos)
+                       por estado T, executadas pelo emulador.
+Assim variantes didáticas do SAP podem ser distribuídas sem editar o código.
+Referência: Tabelas 10-1 e 10-2 e Seções 10.4 e 10.5 (ciclos de busca e execução).
+"""
+
+import json
+import os
+import sys
+from array import array
+from collections import namedtuple
+
+# Micro-operações aceitas em cada estado T: nome -> número de argumentos.
+MICRO_OPS = {
+    "status": 1,      # texto da barra de status (campos: operand, PC, PC_next, MAR, IR, ACC, B, Z, C, mnemonic)
+    "clock": 0,       # pulso do clock
+    "highlight": 1,   # destaca um componente do canvas
+    "bus": 2,         # transferência origem -> destino pelo Barramento W
+    "direct": 3,      # transferência direta origem -> destino pelo fio indicado
+    "read": 1,        # leitura de Memória[MAR] para o componente indicado
+    "load": 2,        # registrador <- origem
+    "increment": 1,   # registrador += 1
+    "alu": 1,         # ULA calcula ACC (op) B e atualiza as flags da instrução
+    "clear_alu": 0,   # apaga o valor exibido na ULA
+    "in": 0,          # lê a Porta de Entrada (interrompe no fim dos dados)
+    "out": 0,         # publica o Registrador de Saída nos dispositivos de saída
+    "halt": 0,        # interrompe a execução
+    "jump": 1,        # PC <- operando se a condição (JUMP_CONDITIONS) for verdadeira
+    "refresh": 0,     # atualiza os valores exibidos
+    "show": 0,        # atualiza os valores e faz a pausa de fim de estado T
+}
+
+REGISTERS = ("PC", "MAR", "IR", "ACC", "B", "output", "input")
+LOAD_SOURCES = REGISTERS + ("operand", "memory", "alu")
+OPERAND_KINDS = ("none", "address")
+FLAGS = ("Z", "C")
+
+# Condições de desvio: nome -> função(flags) -> desvia?
+JUMP_CONDITIONS = {
+    "always": lambda flags: True,
+    "Z": lambda flags: flags["Z"] == 1,
+    "C": lambda flags: flags["C"] == 1,
+    "NZ": lambda flags: flags["Z"] == 0,
+}
+
+# Operações da ULA em tabelas pré-calculadas de 256x256 entradas, indexadas por
+# (a << 8) | b. Cada entrada traz o resultado de 8 bits e as flags já calculadas:
+# bits 0-7 resultado, bit 8 Z (resultado zero), bit 9 C (carry).
+# A subtração é feita como no somador-subtrator, A + ~B + 1 (complemento de 2),
+# então o carry indica que não houve empréstimo (A >= B).
+
+
+def _alu_table(operation):
+    table = array("H")
+    for a in range(256):
+        for b in range(256):
+            total = operation(a, b)
+            result = total & 0xFF
+            table.append(result | (result == 0) << 8 | (total > 0xFF) << 9)
+    return table
+
+
+ALU_TABLES = {
+    "add": _alu_table(lambda a, b: a + b),
+    "sub": _alu_table(lambda a, b: a + (b ^ 0xFF) + 1),
+}
+
+
+def alu(operation, a, b):
+    """Consulta a tabela da ULA. Retorna (resultado, Z, C)."""
+    entry = ALU_TABLES[operation][a << 8 | b]
+    return entry & 0xFF, entry >> 8 & 1, entry >> 9
+
+
+Instruction = namedtuple("Instruction", "mnemonic opcode operand flags states description")
+
+
+def isa_dir():
+    """Pasta com os arquivos de ISA (também dentro do executável do PyInstaller)."""
+    base = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base, "isa")
+
+
+class ISA:
+    """Conjunto de instruções compilado a partir da descrição em JSON."""
+
+    def __init__(self, spec, source="<isa>"):
+        self.source = source
+        self.name = spec.get("name", source)
+        self.reference = spec.get("reference", "")
+        self.operand_bits = spec.get("operand_bits", 4)
+        if not 0 < self.operand_bits < 8:
+            raise ValueError(f"{source}: operand_bits deve estar entre 1 e 7.")
+        self.operand_mask = (1 << self.operand_bits) - 1
+        self.fetch = self._compile_states(spec.get("fetch", []), "busca")
+
+        self.instructions = []
+        self.opcodes = {}
+        for entry in spec["instructions"]:
+            instruction = self._compile_instruction(entry)
+            if instruction.mnemonic in self.opcodes:
+                raise ValueError(f"{source}: mnemônico repetido: {instruction.mnemonic}.")
+            if instruction.opcode in self.opcodes.values():
+                raise ValueError(f"{source}: opcode repetido em {instruction.mnemonic}.")
+            self.opcodes[instruction.mnemonic] = instruction.opcode
+            self.instructions.append(instruction)
+        self.instructions = tuple(self.instructions)
+        self.operand_mnemonics = frozenset(i.mnemonic for i in self.instructions if i.operand != "none")
+
+        # Operandos de endereço carregam o MAR: não podem apontar para fora da memória.
+        from montador_sap import MEMORY_SIZE
+        if self.operand_mnemonics and self.operand_mask >= MEMORY_SIZE:
+            raise ValueError(f"{source}: operand_bits={self.operand_bits} endereça além da memória "
+                             f"({MEMORY_SIZE} bytes).")
+
+        # Tabela de decodificação: o byte inteiro do IR indexa direto a instrução e o operando.
+        self.decode = [None] * 256
+        for instruction in self.instructions:
+            base = instruction.opcode << self.operand_bits
+            for operand in range(self.operand_mask + 1):
+                self.decode[base | operand] = (instruction, operand)
+
+    def _compile_instruction(self, entry):
+        mnemonic = entry["mnemonic"].upper()
+        where = f"{self.source}: {mnemonic}"
+        opcode = int(str(entry["opcode"]), 2)
+        if not 0 <= opcode < 1 << (8 - self.operand_bits):
+            raise ValueError(f"{where}: opcode fora do range.")
+        operand = entry.get("operand", "none")
+        if operand not in OPERAND_KINDS:
+            raise ValueError(f"{where}: tipo de operando desconhecido: {operand}.")
+        flags = tuple(entry.get("flags", ()))
+        for flag in flags:
+            if flag not in FLAGS:
+                raise ValueError(f"{where}: flag desconhecida: {flag}.")
+        states = self._compile_states(entry["states"], mnemonic)
+        return Instruction(mnemonic, opcode, operand, flags, states, entry.get("description", ""))
+
+    def _compile_states(self, states, where):
+        """Valida e converte cada estado T numa tupla de (micro-operação, argumentos)."""
+        compiled = []
+        for t, state in enumerate(states, 1):
+            ops = []
+            for op in state:
+                name, args = op[0], tuple(op[1:])
+                if name not in MICRO_OPS:
+                    raise ValueError(f"{self.source}: {where}, estado {t}: micro-operação desconhecida: {name}.")
+                if len(args) != MICRO_OPS[name]:
+                    raise ValueError(f"{self.source}: {where}, estado {t}: {name} espera {MICRO_OPS[name]} argumento(s).")
+                if name == "load" and (args[0] not in REGISTERS or args[1] not in LOAD_SOURCES):
+                    raise ValueError(f"{self.source}: {where}, estado {t}: load inválido: {args}.")
+                if name == "increment" and args[0] not in REGISTERS:
+                    raise ValueError(f"{self.source}: {where}, estado {t}: registrador desconhecido: {args[0]}.")
+                if name == "alu" and args[0] not in ALU_TABLES:
+                    raise ValueError(f"{self.source}: {where}, estado {t}: operação da ULA desconhecida: {args[0]}.")
+                if name == "jump" and args[0] not in JUMP_CONDITIONS:
+                    raise ValueError(f"{self.source}: {where}, estado {t}: condição de desvio desconhecida: {args[0]}.")
+                ops.append((name, args))
+            compiled.append(tuple(ops))
+        return tuple(compiled)
+
+
+_loaded = {}
+
+
+def load_isa(name="sap1"):
+    """
+    Carrega e compila um conjunto de instruções. `name` é o nome de um arquivo
+    em isa/ (sem .json) ou o caminho de um arquivo JSON. O resultado fica em cache.
+    """
+    path = name if name.endswith(".json") else os.path.join(isa_dir(), name + ".json")
+    path = os.path.abspath(path)
+    if path not in _loaded:
+        with open(path, encoding="utf-8") as f:
+            _loaded[path] = ISA(json.load(f), source=os.path.basename(path))
+    return _loaded[path]
@@ -0,0 +1,161 @@
+"""
+Montador (Assembler) do SAP-1.
+
+Cada linha é analisada de forma independente por parse_line(), que devolve
+a classificação da linha, os tokens com suas colunas (usados no destaque de
+sintaxe do editor) e o erro da linha, se houver. assemble_lines() junta as
+linhas já analisadas, aplica as verificações que dependem do contexto
+(ORG antes de DB, limite da memória) e gera a imagem da memória.
+Os mnemônicos e opcodes vêm do conjunto de instruções carregado (isa_sap).
+Referência: Seção 10.3 (Programação do SAP-1) e Tabela 10-2 (Código Op do SAP-1).
+"""
+
+import re
+from collections import namedtuple
+
+from isa_sap import load_isa
+
+# Tamanho da memória do SAP-1, conforme a arquitetura.
+MEMORY_SIZE = 16
+
+DIRECTIVES = ("ORG", "DB")
+
+# kind: "instr", "org", "db" ou None (linha vazia/comentário).
+# value: byte montado (instr), endereço (org) ou dado (db).
+# tokens: tuplas (tipo, coluna_inicial, coluna_final).
+# error: (mensagem, coluna_inicial, coluna_final) ou None.
+ParsedLine = namedtuple("ParsedLine", "kind value tokens error")
+
+_WORD = re.compile(r"\S+")
+
+
+def _hex(text):
+    try:
+        return int(text, 16)
+    except ValueError:
+        return None
+
+
+def parse_line(line, isa=None):
+    """
+    Analisa uma linha de código Assembly, sem depender das outras linhas.
+    isa: conjunto de instruções (padrão: SAP-1).
+    """
+    isa = isa or load_isa()
+    comment_start = line.find(';')
+    code = line if comment_start == -1 else line[:comment_start]
+    tokens = []
+    words = [(m.group(), m.start(), m.end()) for m in _WORD.finditer(code)]
+    if comment_start != -1:
+        comment = ("comment", comment_start, len(line))
+    else:
+        comment = None
+
+    def result(kind, value=None, error=None):
+        if comment:
+            tokens.append(comment)
+        return ParsedLine(kind, value, tuple(tokens), error)
+
+    if not words:
+        return result(None)
+
+    word, start, end = words[0]
+    mnemonic = word.upper()
+    operand = words[1] if len(words) > 1 else None
+
+    if mnemonic == "ORG":
+        tokens.append(("directive", start, end))
+        if operand is None:
+            return result("org", error=("ORG requer um endereço.", start, end))
+        addr = _hex(operand[0])
+        if addr is None:
+            tokens.append(("error", operand[1], operand[2]))
+            return result("org", error=(f"Endereço ORG inválido: {operand[0]}. Esperado hexadecimal.", operand[1], operand[2]))
+        if not (0 <= addr < MEMORY_SIZE):
+            tokens.append(("error", operand[1], operand[2]))
+            return result("org", error=(f"Endereço ORG fora do range (00-{MEMORY_SIZE-1:01X}).", operand[1], operand[2]))
+        tokens.append(("hex", operand[1], operand[2]))
+        return result("org", addr)
+
+    if mnemonic == "DB":
+        tokens.append(("directive", start, end))
+        if operand is None:
+            return result("db", error=("DB requer um valor.", start, end))
+        try:
+            value = int(operand[0])
+        except ValueError:
+            tokens.append(("error", operand[1], operand[2]))
+            return result("db", error=(f"Valor DB inválido: {operand[0]}.", operand[1], operand[2]))
+        if not (0 <= value <= 255):
+            tokens.append(("error", operand[1], operand[2]))
+            return result("db", error=("Valor DB deve ser entre 0 e 255.", operand[1], operand[2]))
+        tokens.append(("number", operand[1], operand[2]))
+        return result("db", value)
+
+    if mnemonic not in isa.opcodes:
+        tokens.append(("error", start, end))
+        return result("instr", error=(f"Instrução inválida: {mnemonic}.", start, end))
+    tokens.append(("mnemonic", start, end))
+
+    value = 0
+    if mnemonic in isa.operand_mnemonics:
+        if operand is None:
+            return result("instr", error=(f"Falta operando para {mnemonic}.", start, end))
+        value = _hex(operand[0])
+        if value is None:
+            tokens.append(("error", operand[1], operand[2]))
+            return result("instr", error=(f"Operando inválido para {mnemonic}. Esperado hexadecimal.", operand[1], operand[2]))
+        limit = min(isa.operand_mask + 1, MEMORY_SIZE)
+        if not (0 <= value < limit):
+            tokens.append(("error", operand[1], operand[2]))
+            return result("instr", error=(f"Operando {mnemonic} deve ser entre 00 e {limit-1:01X}.", operand[1], operand[2]))
+        tokens.append(("hex", operand[1], operand[2]))
+    elif operand is not None:
+        tokens.append(("error", operand[1], operand[2]))
+        return result("instr", error=(f"Instrução {mnemonic} não aceita operando.", operand[1], operand[2]))
+
+    return result("instr", (isa.opcodes[mnemonic] << isa.operand_bits) | value)
+
+
+def assemble_lines(parsed_lines):
+    """
+    Monta uma sequência de linhas já analisadas.
+    Retorna (memória, erros, mapa_de_fonte):
+        erros: lista de (número_da_linha, mensagem). Todas as linhas são
+               verificadas, não apenas até o primeiro erro.
+        mapa_de_fonte: para cada endereço, (número_da_linha, "instr" ou "db")
+               da linha que o preencheu, ou None.
+    """
+    memory = [0] * MEMORY_SIZE
+    source_map = [None] * MEMORY_SIZE
+    errors = []
+    instruction_ptr = 0
+    data_ptr = None
+
+    for line_num, parsed in enumerate(parsed_lines, 1):
+        if parsed.error:
+            errors.append((line_num, parsed.error[0]))
+        elif parsed.kind == "org":
+            data_ptr = parsed.value
+        elif parsed.kind == "db":
+            if data_ptr is None:
+                errors.append((line_num, "DB requer um ORG antes."))
+            elif data_ptr >= MEMORY_SIZE:
+                errors.append((line_num, f"Memória insuficiente para DB (máx. {MEMORY_SIZE} bytes, endereço {MEMORY_SIZE-1:01X})."))
+            else:
+                memory[data_ptr] = parsed.value
+                source_map[data_ptr] = (line_num, "db")
+                data_ptr += 1
+        elif parsed.kind == "instr":
+            if instruction_ptr >= MEMORY_SIZE:
+                errors.append((line_num, f"Programa muito grande para memória (máx. {MEMORY_SIZE} bytes, endereço {MEMORY_SIZE-1:01X})."))
+            else:
+                memory[instruction_ptr] = parsed.value
+                source_map[instruction_ptr] = (line_num, "instr")
+                instruction_ptr += 1
+    return memory, errors, source_map
+
+
+def assemble_source(code, isa=None):
+    """Monta o código-fonte completo. Retorna (memória, erros, mapa_de_fonte)."""
+    return assemble_lines(parse_line(line, isa) for line in code.split('\n'))
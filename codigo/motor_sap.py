@@ -0,0 +1,196 @@
+"""
+Motor de execução rápido do SAP-1 (sem animação e sem Tk).
+
+Executa um programa já montado com a mesma semântica de SAP1Emulator.step()
+e dos roteiros de isa/sap1.json, mas num laço com variáveis locais, sem pausas
+nem atualização de tela. É o caminho usado em execuções longas e em lote; o
+fuzzer_sap.py verifica que ele não diverge do step().
+
+Soma e subtração consultam as tabelas pré-calculadas da ULA (isa_sap.ALU_TABLES),
+que já trazem o resultado e as flags Z e C. Com os desvios, a execução para no
+limite de instruções ou ao detectar um laço infinito (estado da máquina repetido,
+como em SAP1Emulator.detect_loop).
+
+Uso em lote, a partir de imagens de memória já montadas (sem passar pelo montador):
+    python motor_sap.py prova1.hex prova2.json --entradas "5, 3"
+    python motor_sap.py --concatenadas turma.bin
+"""
+
+import argparse
+
+from montador_sap import MEMORY_SIZE
+from isa_sap import ALU_TABLES
+
+# Motivos de parada.
+STOP_HLT = "hlt"
+STOP_PC = "pc"                # PC chegou ao fim da memória
+STOP_INVALID = "invalid"      # opcode inválido
+STOP_NO_INPUT = "no-input"    # IN sem porta de entrada conectada
+STOP_INPUT_END = "input-end"  # IN no fim dos dados de entrada
+STOP_LIMIT = "limit"          # limite de instruções atingido
+STOP_LOOP = "loop"            # laço infinito: o estado da máquina se repetiu
+
+
+def pack_state(pc, mar, ir, acc, b, out, inp, flags):
+    """
+    Registradores e flags (bit 0 Z, bit 1 C) empacotados num único inteiro: um hash
+    perfeito do estado da máquina, usado na detecção de laços de todos os motores.
+    """
+    return pc | mar << 5 | ir << 9 | acc << 17 | b << 25 | out << 33 | inp << 41 | flags << 49
+
+
+def new_state(memory):
+    """Estado inicial da CPU no mesmo formato de SAP1Emulator.cpu."""
+    return {
+        "PC": 0, "ACC": 0, "MAR": 0, "IR": 0, "B": 0,
+        "memory": list(memory),
+        "output": 0, "input": 0,
+        "flags": {"Z": 0, "C": 0},
+    }
+
+
+def run_fast(memory, inputs=None, output_devices=(), max_steps=1_000_000, detect_loops=True):
+    """
+    Executa o programa a partir de PC = 0.
+
+    inputs: iterável com os valores da Porta de Entrada (uma InputPort também
+            serve) ou None se não houver porta conectada.
+    output_devices: dispositivos que recebem cada valor de OUT.
+    detect_loops: para com STOP_LOOP quando o estado da máquina se repete.
+
+    Retorna o estado final da CPU acrescido de "stop" (motivo da parada),
+    "steps" (instruções iniciadas, como no laço de run_program) e "outputs".
+    """
+    cpu = new_state(memory)
+    mem = cpu["memory"]
+    add = ALU_TABLES["add"]
+    sub = ALU_TABLES["sub"]
+    pc = acc = mar = ir = b = out = inp = 0
+    flags = 0  # bit 0 Z, bit 1 C (como nos bits 8 e 9 das tabelas da ULA)
+    outputs = []
+    next_input = iter(inputs).__next__ if inputs is not None else None
+    seen = set()
+
+    stop = STOP_LIMIT
+    steps = 0
+    while steps < max_steps:
+        steps += 1
+        if pc >= MEMORY_SIZE:
+            stop = STOP_PC
+            break
+        if detect_loops:
+            key = pack_state(pc, mar, ir, acc, b, out, inp, flags)
+            if key in seen:
+                stop = STOP_LOOP
+                break
+            seen.add(key)
+        # Busca: T1 PC -> MAR, T2 PC++, T3 Memória[MAR] -> IR
+        mar = pc
+        pc += 1
+        ir = mem[mar]
+        opcode = ir >> 4
+        operand = ir & 0x0F
+
+        if opcode == 0b0000:    # LDA
+            mar = operand
+            acc = mem[mar]
+        elif opcode == 0b0001:  # ADD
+            mar = operand
+            b = mem[mar]
+            entry = add[acc << 8 | b]
+            acc = entry & 0xFF
+            flags = entry >> 8
+        elif opcode == 0b0010:  # SUB
+            mar = operand
+            b = mem[mar]
+            entry = sub[acc << 8 | b]
+            acc = entry & 0xFF
+            flags = entry >> 8
+        elif opcode == 0b0110:  # JMP
+            pc = operand
+        elif opcode == 0b0111:  # JC
+            if flags & 2:
+                pc = operand
+        elif opcode == 0b1000:  # JZ
+            if flags & 1:
+                pc = operand
+        elif opcode == 0b1001:  # JNZ
+            if not flags & 1:
+                pc = operand
+        elif opcode == 0b1101:  # IN
+            if next_input is None:
+                stop = STOP_NO_INPUT
+                break
+            try:
+                inp = next_input() & 0xFF
+            except StopIteration:
+                stop = STOP_INPUT_END
+                break
+            acc = inp
+            seen.clear()
+        elif opcode == 0b1110:  # OUT
+            out = acc
+            outputs.append(out)
+            for device in output_devices:
+                device.write(out)
+        elif opcode == 0b1111:  # HLT
+            stop = STOP_HLT
+            break
+        else:
+            stop = STOP_INVALID
+            break
+
+    for device in output_devices:
+        device.flush()
+    cpu.update(PC=pc, ACC=acc, MAR=mar, IR=ir, B=b, output=out, input=inp)
+    cpu["flags"] = {"Z": flags & 1, "C": flags >> 1}
+    cpu.update(stop=stop, steps=steps, outputs=outputs)
+    return cpu
+
+
+def main(argv=None):
+    from dispositivos_sap import read_values
+    from imagem_sap import iter_raw_images, load_image
+    from isa_sap import load_isa
+
+    parser = argparse.ArgumentParser(description="Executa imagens de memória do SAP-1 sem animação.")
+    parser.add_argument("imagens", nargs="+", help="arquivos .bin, .hex ou .json")
+    parser.add_argument("--concatenadas", action="store_true",
+                        help="cada arquivo .bin contém várias imagens de 16 bytes seguidas")
+    parser.add_argument("--entradas", default=None, help="valores da Porta de Entrada (ex.: \"5, 0x10\")")
+    parser.add_argument("--max-passos", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    inputs = None
+    if args.entradas is not None:
+        try:
+            inputs = list(read_values([args.entradas.encode()]))
+        except ValueError as e:
+            parser.error(f"--entradas: {e}")
+
+    isa = load_isa().name
+
+    def images():
+        for path in args.imagens:
+            if args.concatenadas:
+                try:
+                    for index, memory in enumerate(iter_raw_images(path, MEMORY_SIZE)):
+                        yield f"{path}[{index}]", memory
+                except (OSError, ValueError) as e:
+                    parser.error(f"{path}: {e}")
+            else:
+                try:
+                    image = load_image(path, MEMORY_SIZE, isa=isa)
+                except (OSError, ValueError) as e:
+                    parser.error(f"{path}: {e}")
+                yield path, image.memory
+
+    for name, memory in images():
+        result = run_fast(memory, inputs, max_steps=args.max_passos)
+        outputs = " ".join(f"{value:02X}" for value in result["outputs"])
+        print(f"{name}: parada={result['stop']} passos={result['steps']} "
+              f"ACC={result['ACC']:02X} saídas=[{outputs}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Emulador SAP-1 sem janela (off-screen).
+
+Reaproveita o próprio SAP1Emulator (mesmo step(), mesmas animações e o mesmo
+desenho de draw_cpu_components), trocando os widgets do Tk por substitutos que
+apenas guardam estado. As pausas de animação viram tempo virtual, então uma
+execução completa roda em milissegundos e sem precisar de display.
+"""
+
+from emulador_sap import DEFAULT_CYCLE_LIMIT, SAP1Emulator
+from rastro_sap import TraceBuffer
+from ritmo_sap import FrameBudget
+
+
+class StatusVar:
+    """Substituto de tk.StringVar para a barra de status."""
+
+    def __init__(self, value=""):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class HeadlessEditor:
+    """Substituto mínimo de tk.Text: guarda o código-fonte e ignora tags."""
+
+    def __init__(self, source=""):
+        self.source = source
+
+    def get(self, *_):
+        return self.source + "\n"
+
+    def delete(self, *_):
+        self.source = ""
+
+    def insert(self, _, text):
+        self.source += text
+
+    def tag_add(self, *_):
+        pass
+
+    def tag_remove(self, *_):
+        pass
+
+    def see(self, *_):
+        pass
+
+
+class RecordingCanvas:
+    """
+    Canvas em memória com a mesma API usada pelo emulador (create_*, itemconfig,
+    itemcget, find_withtag, delete, update).
+    Cada chamada a update() corresponde a um quadro da animação; se on_update for
+    informado, ele recebe um snapshot imutável da cena.
+    """
+
+    _DEFAULTS = {
+        "rectangle": {"fill": "", "outline": "black", "width": 1},
+        "oval": {"fill": "", "outline": "black", "width": 1},
+        "line": {"fill": "black", "width": 1},
+        "text": {"fill": "black", "text": "", "anchor": "center", "font": ("Arial", 10)},
+    }
+
+    def __init__(self, width=850, height=600, bg="#f0f0f0", on_update=None):
+        self.width = width
+        self.height = height
+        self.bg = bg
+        self.on_update = on_update
+        self.items = {}   # id -> [tipo, coords, opções, tags]
+        self.tag_index = {}
+        self.next_id = 1
+
+    def _create(self, kind, coords, options):
+        tags = options.pop("tags", ())
+        if isinstance(tags, str):
+            tags = tuple(tags.split())
+        opts = dict(self._DEFAULTS[kind])
+        opts.update(options)
+        item_id = self.next_id
+        self.next_id += 1
+        self.items[item_id] = [kind, tuple(coords), opts, tags]
+        for tag in tags:
+            self.tag_index.setdefault(tag, []).append(item_id)
+        return item_id
+
+    def create_rectangle(self, *coords, **options):
+        return self._create("rectangle", coords, options)
+
+    def create_oval(self, *coords, **options):
+        return self._create("oval", coords, options)
+
+    def create_line(self, *coords, **options):
+        return self._create("line", coords, options)
+
+    def create_text(self, *coords, **options):
+        return self._create("text", coords, options)
+
+    def find_withtag(self, tag_or_id):
+        if tag_or_id == "all":
+            return tuple(self.items)
+        if isinstance(tag_or_id, int):
+            return (tag_or_id,) if tag_or_id in self.items else ()
+        return tuple(self.tag_index.get(tag_or_id, ()))
+
+    def itemconfig(self, tag_or_id, **options):
+        for item_id in self.find_withtag(tag_or_id):
+            self.items[item_id][2].update(options)
+
+    def itemcget(self, tag_or_id, option):
+        for item_id in self.find_withtag(tag_or_id):
+            return self.items[item_id][2].get(option, "")
+        return ""
+
+    def delete(self, tag_or_id):
+        for item_id in self.find_withtag(tag_or_id):
+            for tag in self.items.pop(item_id)[3]:
+                self.tag_index[tag].remove(item_id)
+
+    def snapshot(self):
+        """Lista imutável (tipo, coords, opções) na ordem de desenho."""
+        return tuple((kind, coords, tuple(sorted(opts.items())))
+                     for kind, coords, opts, _ in self.items.values())
+
+    def update(self):
+        if self.on_update is not None:
+            self.on_update(self.snapshot())
+
+    def update_idletasks(self):
+        pass
+
+
+class NullCanvas:
+    """Canvas que descarta todo desenho; usado quando só o estado da CPU interessa."""
+
+    def _ignore(self, *_, **__):
+        return 0
+
+    create_rectangle = create_oval = create_line = create_text = _ignore
+    itemconfig = delete = update = update_idletasks = _ignore
+
+    def itemcget(self, *_):
+        return ""
+
+    def find_withtag(self, _):
+        return ()
+
+
+class HeadlessEmulator(SAP1Emulator):
+    """
+    SAP1Emulator sem Tk. O tempo de animação é acumulado em self.clock
+    (segundos virtuais) e cada quadro desenhado é repassado a on_frame(t, cena, status).
+    """
+
+    def __init__(self, source="", clock_speed=1.0, on_frame=None, output_devices=(), input_port=None,
+                 canvas=None, isa=None):
+        # Sem janela não há custo de desenho a compensar: a animação fica sempre completa.
+        # O rastro mede tempo real; sem janela ele fica desligado, a não ser que se peça.
+        self.init_state(isa, clock_speed, output_devices, input_port,
+                        frame_budget=FrameBudget(adaptive=False), trace=TraceBuffer(enabled=False))
+        self.clock = 0.0
+        self.errors = []
+        self.on_frame = on_frame
+        self.gate_mode = StatusVar(False)
+        self.cycle_limit = StatusVar(DEFAULT_CYCLE_LIMIT)
+        self.disassembly = None  # o painel de desmontagem só existe na janela
+
+        self.editor = HeadlessEditor(source)
+        self.status_var = StatusVar("Pronto para executar")
+        self.canvas = canvas if canvas is not None else RecordingCanvas(on_update=self._frame if on_frame else None)
+
+        self.draw_cpu_components()
+        self.draw_legend()
+        self.initialize_cpu()
+
+    def _frame(self, scene):
+        self.on_frame(self.clock, scene, self.status_var.get())
+
+    def _sleep(self, seconds):
+        self.clock += seconds
+
+    def _show_error(self, title, message):
+        self.errors.append(f"{title}: {message}")
+        self.status_var.set(message)
+
+    def run(self, max_steps=DEFAULT_CYCLE_LIMIT):
+        """
+        Equivalente sem thread do laço de run_program(): executa até HLT, erro,
+        PC fora da memória, laço infinito ou max_steps instruções.
+        Retorna o número de instruções executadas.
+        """
+        self.cpu['PC'] = 0
+        self.update_visualization()
+        self.canvas.update()
+        self.running = True
+        self.seen_states.clear()
+        steps = 0
+        while self.running and steps < max_steps:
+            steps += 1
+            if self.detect_loop():
+                break
+            if not self.step():
+                break
+            self._sleep(0.5 / self.clock_speed)
+        self.running = False
+        self.flush_output_devices()
+        self.canvas.update()
+        return steps
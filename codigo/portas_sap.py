@@ -0,0 +1,406 @@
+"""
+Simulação do SAP-1 em nível de portas/RTL.
+
+O caminho de dados e o controle da Fig. 10-1 (contador em anel, matriz de
+controle, drivers tri-state do Barramento W, somador-subtrator) são descritos
+como um netlist de portas. Cada fio de um barramento é um bit de um inteiro
+Python, então uma porta AND/OR/XOR do netlist avalia os 8 bits de um
+barramento de uma vez (simulação bit-paralela).
+
+Os desvios JMP/JC/JZ/JNZ (extensão deste emulador) usam um registrador de flags
+(Z, C) carregado junto com o acumulador em ADD e SUB, e um sinal Lp que carrega
+o PC com o operando do IR pelo Barramento W.
+
+O netlist é levelizado (cada porta só depende de portas de nível menor) e
+compilado para uma única função Python em linha reta, que avalia toda a
+lógica combinacional de um estado T numa chamada. Os registradores são
+atualizados na borda do clock com os valores "próximo estado" calculados.
+
+run_gates() tem a mesma interface de motor_sap.run_fast() e é verificado
+contra o step() de referência pelo fuzzer_sap.py (motor "portas").
+"""
+
+from motor_sap import (STOP_HLT, STOP_INPUT_END, STOP_INVALID, STOP_LIMIT, STOP_LOOP, STOP_NO_INPUT, STOP_PC,
+                       new_state, pack_state)
+
+# Conjunto de instruções implementado pelo netlist (nome em isa/*.json).
+ISA_NAME = "SAP-1"
+
+# Sinais de controle (ativos em nível alto), na ordem da palavra de controle de Malvino,
+# mais os desta versão do emulador: Ein (porta de entrada no barramento), Lp (carga do
+# PC nos desvios) e Lf (carga das flags).
+CONTROL_SIGNALS = ("Cp", "Ep", "Lm", "CE", "Li", "Ei", "La", "Ea", "Su", "Eu", "Lb", "Lo", "Ein", "Lp", "Lf")
+
+# Registradores do circuito e suas larguras. O PC tem um bit a mais, que indica
+# que ele passou do fim da memória (o step() de referência para nesse caso).
+# FL guarda as flags: bit 0 Z, bit 1 C.
+REGISTERS = (("PC", 5), ("MAR", 4), ("IR", 8), ("ACC", 8), ("B", 8), ("OUT", 8), ("INL", 8), ("FL", 2),
+             ("T", 6))
+PRIMARY_INPUTS = (("INPORT", 8),)
+
+
+class Netlist:
+    """
+    Netlist de portas sobre palavras de bits.
+    Cada net é (operação, entradas, argumento, largura); as operações são
+    bit a bit sobre todos os bits da palavra ao mesmo tempo.
+    """
+
+    def __init__(self):
+        self.nets = []
+        self.inputs = {}
+        self.outputs = {}
+
+    def _add(self, op, inputs=(), arg=None, width=1):
+        self.nets.append((op, tuple(inputs), arg, width))
+        return len(self.nets) - 1
+
+    def width(self, net):
+        return self.nets[net][3]
+
+    def input(self, name, width):
+        net = self._add("input", (), len(self.inputs), width)
+        self.inputs[name] = net
+        return net
+
+    def output(self, name, net):
+        self.outputs[name] = net
+
+    def const(self, value, width):
+        return self._add("const", (), value & ((1 << width) - 1), width)
+
+    def and_(self, *nets):
+        out = nets[0]
+        for net in nets[1:]:
+            out = self._add("and", (out, net), width=self.width(out))
+        return out
+
+    def or_(self, *nets):
+        out = nets[0]
+        for net in nets[1:]:
+            out = self._add("or", (out, net), width=max(self.width(out), self.width(net)))
+        return out
+
+    def xor(self, a, b):
+        return self._add("xor", (a, b), width=max(self.width(a), self.width(b)))
+
+    def not_(self, a):
+        return self._add("not", (a,), width=self.width(a))
+
+    def shl(self, a, k):
+        return self._add("shl", (a,), k, self.width(a))
+
+    def shr(self, a, k):
+        return self._add("shr", (a,), k, self.width(a))
+
+    def bit(self, a, k):
+        return self._add("slice", (a,), k, 1)
+
+    def slice(self, a, low, width):
+        return self._add("slice", (a,), low, width)
+
+    def rep(self, a, width):
+        """Replica um sinal de 1 bit em todos os bits de uma palavra (habilitação de barramento)."""
+        return self._add("rep", (a,), None, width)
+
+    def ram(self, address, width):
+        """Porta de leitura da RAM 16x8 (primitiva: a memória não é modelada em portas)."""
+        return self._add("ram", (address,), None, width)
+
+    # Blocos construídos a partir das portas acima.
+
+    def tristate(self, enable, data, width):
+        """Driver tri-state: com enable em 0 o driver não contribui para o barramento (OR dos drivers)."""
+        return self.and_(self.rep(enable, width), data)
+
+    def mux(self, select, when_one, when_zero):
+        width = self.width(when_zero)
+        mask = self.rep(select, width)
+        return self.or_(self.and_(mask, when_one), self.and_(self.not_(mask), when_zero))
+
+    def adder(self, a, b, carry_in):
+        """
+        Somador de prefixo paralelo (Kogge-Stone): gera/propaga de todos os bits em
+        cada porta, log2(largura) níveis para os carries. Retorna (soma, carry_out).
+        """
+        width = self.width(a)
+        p0 = self.xor(a, b)
+        g = self.or_(self.and_(a, b), self.and_(p0, carry_in))
+        p = p0
+        distance = 1
+        while distance < width:
+            g = self.or_(g, self.and_(p, self.shl(g, distance)))
+            p = self.and_(p, self.shl(p, distance))
+            distance *= 2
+        carries = self.or_(self.shl(g, 1), carry_in)
+        return self.xor(p0, carries), self.bit(g, width - 1)
+
+    def decoder(self, word, value):
+        """Porta AND que reconhece `value` nos bits de `word` (linha do decodificador)."""
+        terms = []
+        for k in range(self.width(word)):
+            b = self.bit(word, k)
+            terms.append(b if (value >> k) & 1 else self.not_(b))
+        return self.and_(*terms)
+
+    def levelize(self):
+        """Retorna (níveis, ordem): o nível de cada net e a ordem de avaliação por nível."""
+        levels = []
+        for op, inputs, _, _ in self.nets:
+            levels.append(1 + max((levels[i] for i in inputs), default=-1))
+        order = sorted(range(len(self.nets)), key=levels.__getitem__)
+        return levels, order
+
+    def compile(self):
+        """
+        Gera uma função evaluate(entradas, ram) -> saídas com uma atribuição por porta,
+        na ordem levelizada, e a compila uma vez.
+        """
+        _, order = self.levelize()
+        lines = ["def evaluate(inputs, ram):"]
+        for net in order:
+            op, inputs, arg, width = self.nets[net]
+            mask = (1 << width) - 1
+            x = [f"n{i}" for i in inputs]
+            expr = {
+                "input": lambda: f"inputs[{arg}]",
+                "const": lambda: f"{arg}",
+                "and": lambda: f"{x[0]} & {x[1]}",
+                "or": lambda: f"{x[0]} | {x[1]}",
+                "xor": lambda: f"{x[0]} ^ {x[1]}",
+                "not": lambda: f"{x[0]} ^ {mask}",
+                "shl": lambda: f"({x[0]} << {arg}) & {mask}",
+                "shr": lambda: f"{x[0]} >> {arg}",
+                "slice": lambda: f"({x[0]} >> {arg}) & {mask}",
+                "rep": lambda: f"-{x[0]} & {mask}",
+                "ram": lambda: f"ram[{x[0]}]",
+            }[op]()
+            lines.append(f"    n{net} = {expr}")
+        names = list(self.outputs)
+        lines.append("    return (" + ", ".join(f"n{self.outputs[name]}" for name in names) + ",)")
+        namespace = {}
+        exec(compile("\n".join(lines), "<netlist SAP-1>", "exec"), namespace)
+        return CompiledCircuit(namespace["evaluate"], names, self)
+
+
+class CompiledCircuit:
+    """Função compilada do netlist mais o índice de cada saída nomeada."""
+
+    def __init__(self, evaluate, output_names, netlist):
+        self.evaluate = evaluate
+        self.index = {name: i for i, name in enumerate(output_names)}
+        levels, _ = netlist.levelize()
+        self.gate_count = sum(1 for op, *_ in netlist.nets if op not in ("input", "const"))
+        self.depth = max(levels)
+
+
+def build_sap1_netlist():
+    """Monta o netlist do SAP-1 (Fig. 10-1) com a matriz de controle da Seção 10.6."""
+    nl = Netlist()
+    reg = {name: nl.input(name, width) for name, width in REGISTERS}
+    inport = nl.input("INPORT", 8)
+    one = nl.const(1, 1)
+
+    # Contador em anel: T1..T6 em um registrador one-hot de 6 bits.
+    t = [nl.bit(reg["T"], k) for k in range(6)]
+    T1, T2, T3, T4, T5, T6 = t
+
+    # Decodificador de instruções (4 bits mais significativos do IR).
+    opcode = nl.slice(reg["IR"], 4, 4)
+    LDA = nl.decoder(opcode, 0b0000)
+    ADD = nl.decoder(opcode, 0b0001)
+    SUB = nl.decoder(opcode, 0b0010)
+    IN = nl.decoder(opcode, 0b1101)
+    OUT = nl.decoder(opcode, 0b1110)
+    HLT = nl.decoder(opcode, 0b1111)
+    JMP = nl.decoder(opcode, 0b0110)
+    JC = nl.decoder(opcode, 0b0111)
+    JZ = nl.decoder(opcode, 0b1000)
+    JNZ = nl.decoder(opcode, 0b1001)
+    MEMREF = nl.or_(LDA, ADD, SUB)
+    ARITH = nl.or_(ADD, SUB)
+    valid = nl.or_(MEMREF, IN, OUT, HLT, JMP, JC, JZ, JNZ)
+
+    # Condição de desvio a partir do registrador de flags.
+    flag_z = nl.bit(reg["FL"], 0)
+    flag_c = nl.bit(reg["FL"], 1)
+    JUMP = nl.or_(JMP, nl.and_(JC, flag_c), nl.and_(JZ, flag_z), nl.and_(JNZ, nl.not_(flag_z)))
+
+    # Matriz de controle.
+    control = {
+        "Ep": T1,
+        "Lm": nl.or_(T1, nl.and_(T4, MEMREF)),
+        "Cp": T2,
+        "CE": nl.or_(T3, nl.and_(T5, MEMREF)),
+        "Li": T3,
+        "Ei": nl.and_(T4, nl.or_(MEMREF, JUMP)),
+        "La": nl.or_(nl.and_(T5, LDA), nl.and_(T6, ARITH), nl.and_(T4, IN)),
+        "Ea": nl.and_(T4, OUT),
+        "Su": nl.and_(T6, SUB),
+        "Eu": nl.and_(T6, ARITH),
+        "Lb": nl.and_(T5, ARITH),
+        "Lo": nl.and_(T4, OUT),
+        "Ein": nl.and_(T4, IN),
+        "Lp": nl.and_(T4, JUMP),
+        "Lf": nl.and_(T6, ARITH),
+    }
+
+    # Somador-subtrator: B é invertido por Su e Su entra como carry (complemento de 2).
+    b_in = nl.xor(reg["B"], nl.rep(control["Su"], 8))
+    alu, carry = nl.adder(reg["ACC"], b_in, control["Su"])
+    # Flags: Z é o NOR dos 8 bits da soma; C (o carry, alargado para 2 bits) vai para o bit 1.
+    zero = nl.not_(nl.or_(*(nl.bit(alu, k) for k in range(8))))
+    flags_in = nl.or_(zero, nl.shl(nl.or_(carry, nl.const(0, 2)), 1))
+
+    # Barramento W: OR dos drivers tri-state.
+    pc_low = nl.slice(reg["PC"], 0, 4)
+    ram_out = nl.ram(reg["MAR"], 8)
+    w = nl.or_(
+        nl.tristate(control["Ep"], pc_low, 4),
+        nl.tristate(control["CE"], ram_out, 8),
+        nl.tristate(control["Ei"], nl.slice(reg["IR"], 0, 4), 4),
+        nl.tristate(control["Ea"], reg["ACC"], 8),
+        nl.tristate(control["Eu"], alu, 8),
+        nl.tristate(control["Ein"], inport, 8),
+    )
+
+    # Próximo estado dos registradores.
+    pc_inc, _ = nl.adder(reg["PC"], nl.const(0, 5), one)
+    pc_next = nl.mux(control["Cp"], pc_inc, reg["PC"])
+    nl.output("PC", nl.mux(control["Lp"], nl.slice(w, 0, 4), pc_next))
+    nl.output("MAR", nl.mux(control["Lm"], nl.slice(w, 0, 4), reg["MAR"]))
+    nl.output("IR", nl.mux(control["Li"], w, reg["IR"]))
+    nl.output("ACC", nl.mux(control["La"], w, reg["ACC"]))
+    nl.output("B", nl.mux(control["Lb"], w, reg["B"]))
+    nl.output("OUT", nl.mux(control["Lo"], w, reg["OUT"]))
+    nl.output("INL", nl.mux(control["Ein"], inport, reg["INL"]))
+    nl.output("FL", nl.mux(control["Lf"], flags_in, reg["FL"]))
+    nl.output("T", nl.or_(nl.shl(reg["T"], 1), nl.shr(reg["T"], 5)))
+
+    # Sinais observáveis (mostrados no canvas e usados pelo sequenciador).
+    for name, net in control.items():
+        nl.output(name, net)
+    nl.output("W", w)
+    nl.output("ALU", alu)
+    nl.output("CARRY", carry)
+    nl.output("IN", IN)
+    nl.output("HALT", nl.and_(T4, HLT))
+    nl.output("INVALID", nl.and_(T4, nl.not_(valid)))
+    nl.output("PCOV", nl.bit(reg["PC"], 4))
+    return nl
+
+
+_circuit = None
+
+
+def sap1_circuit():
+    """Circuito compilado (compilado na primeira chamada e reutilizado)."""
+    global _circuit
+    if _circuit is None:
+        _circuit = build_sap1_netlist().compile()
+    return _circuit
+
+
+class GateLevelSAP1:
+    """Sequenciador: aplica o clock ao circuito compilado, um estado T por vez."""
+
+    def __init__(self, memory, circuit=None):
+        self.circuit = circuit or sap1_circuit()
+        self.memory = list(memory)
+        self.regs = {name: 0 for name, _ in REGISTERS}
+        self.regs["T"] = 1
+        self.inport = 0
+        self.outputs = []
+
+    def load_cpu(self, cpu):
+        """Copia o estado de SAP1Emulator.cpu (início de uma instrução, T1)."""
+        self.memory = list(cpu['memory'])
+        self.regs.update(PC=cpu['PC'], MAR=cpu['MAR'], IR=cpu['IR'], ACC=cpu['ACC'], B=cpu['B'],
+                         OUT=cpu['output'], INL=cpu['input'],
+                         FL=cpu['flags']['Z'] | cpu['flags']['C'] << 1, T=1)
+
+    def store_cpu(self, cpu):
+        """Escreve o estado do circuito de volta no formato de SAP1Emulator.cpu."""
+        r = self.regs
+        cpu.update(PC=r["PC"], MAR=r["MAR"], IR=r["IR"], ACC=r["ACC"], B=r["B"], output=r["OUT"], input=r["INL"],
+                   flags={"Z": r["FL"] & 1, "C": r["FL"] >> 1})
+
+    def evaluate(self):
+        values = self.circuit.evaluate(tuple(self.regs[name] for name, _ in REGISTERS) + (self.inport,),
+                                       self.memory)
+        return {name: values[i] for name, i in self.circuit.index.items()}
+
+    def clock(self, signals):
+        for name, _ in REGISTERS:
+            self.regs[name] = signals[name]
+        if signals["Lo"]:
+            self.outputs.append(signals["OUT"])
+
+    def step_instruction(self, next_input=None, on_tstate=None):
+        """
+        Executa os 6 estados T de uma instrução.
+        on_tstate(número_do_estado, sinais) é chamado antes de cada borda do clock.
+        Retorna None ou o motivo de parada (mesmos códigos de motor_sap).
+        """
+        for k in range(6):
+            signals = self.evaluate()
+            if k == 0 and signals["PCOV"]:
+                return STOP_PC
+            if k == 3:
+                if signals["HALT"]:
+                    return STOP_HLT
+                if signals["INVALID"]:
+                    return STOP_INVALID
+                if signals["IN"]:
+                    if next_input is None:
+                        return STOP_NO_INPUT
+                    try:
+                        self.inport = next_input() & 0xFF
+                    except StopIteration:
+                        return STOP_INPUT_END
+                    signals = self.evaluate()
+            if on_tstate is not None:
+                on_tstate(k + 1, signals)
+            self.clock(signals)
+        return None
+
+
+def run_gates(memory, inputs=None, output_devices=(), max_steps=1_000_000, detect_loops=True):
+    """Mesma interface e resultado de motor_sap.run_fast(), executando o netlist."""
+    machine = GateLevelSAP1(memory)
+    seen = set()
+    next_input = None
+    if inputs is not None:
+        read = iter(inputs).__next__
+
+        def next_input():
+            seen.clear()  # a próxima entrada não faz parte do estado da máquina
+            return read()
+
+    stop = STOP_LIMIT
+    steps = 0
+    while steps < max_steps:
+        steps += 1
+        if detect_loops and not machine.regs["PC"] >> 4:
+            r = machine.regs
+            key = pack_state(r["PC"], r["MAR"], r["IR"], r["ACC"], r["B"], r["OUT"], r["INL"], r["FL"])
+            if key in seen:
+                stop = STOP_LOOP
+                break
+            seen.add(key)
+        written = len(machine.outputs)
+        stop = machine.step_instruction(next_input)
+        for value in machine.outputs[written:]:
+            for device in output_devices:
+                device.write(value)
+        if stop is not None:
+            break
+    else:
+        stop = STOP_LIMIT
+    for device in output_devices:
+        device.flush()
+
+    cpu = new_state(memory)
+    machine.store_cpu(cpu)
+    cpu.update(stop=stop, steps=steps, outputs=machine.outputs)
+    return cpu
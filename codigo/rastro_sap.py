@@ -0,0 +1,126 @@
+"""
+Rastro de eventos da execução, exportável no formato Chrome trace-event.
+
+Cada estado T da busca e da execução, cada redesenho do Tk e cada pausa da
+animação vira um evento com início e duração. Os eventos vão para um buffer
+circular pré-alocado sem locks: cada evento pega o próximo índice de um
+itertools.count (cuja chamada é atômica no CPython) e grava na sua posição,
+sobrescrevendo os mais antigos quando o buffer enche. O custo por evento é
+de cerca de um microssegundo, então o rastro pode ficar sempre ligado; um
+rastro desligado não aloca o buffer.
+
+O arquivo exportado abre no Perfetto (ui.perfetto.dev) ou em chrome://tracing
+e mostra onde o tempo de uma execução foi gasto: emulação, Tk ou pausas.
+"""
+
+import bisect
+import itertools
+import json
+import os
+import threading
+import time
+
+# Categorias dos eventos.
+CAT_INSTRUCTION = "instrucao"
+CAT_STATE = "estado"
+CAT_TK = "tk"
+CAT_SLEEP = "pausa"
+CAT_STATUS = "status"
+# Chave de summary(): tempo das instruções sem o Tk e as pausas aninhados.
+CAT_EMULATION = "emulacao"
+
+
+class TraceBuffer:
+    """Buffer circular de eventos (fase, nome, categoria, início_ns, duração_ns, thread, args)."""
+
+    def __init__(self, capacity=65536, enabled=True, clock=time.perf_counter_ns):
+        self.capacity = capacity
+        self.now = clock
+        self._events = None     # alocado só quando o rastro é ligado
+        self._next = itertools.count().__next__
+        self.enabled = enabled
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value):
+        self._enabled = value
+        if value and self._events is None:
+            self._events = [None] * self.capacity
+
+    def complete(self, name, category, start, args=None):
+        """Registra um evento que começou em `start` (valor de now()) e termina agora."""
+        if not self._enabled:
+            return
+        end = self.now()
+        self._events[self._next() % self.capacity] = (
+            "X", name, category, start, end - start, threading.get_ident(), args)
+
+    def instant(self, name, category, args=None):
+        """Registra um evento sem duração (ex.: mudança do texto de status)."""
+        if not self._enabled:
+            return
+        self._events[self._next() % self.capacity] = (
+            "i", name, category, self.now(), 0, threading.get_ident(), args)
+
+    def clear(self):
+        if self._events is not None:
+            self._events = [None] * self.capacity
+
+    def events(self):
+        """Eventos ainda no buffer, em ordem de início."""
+        if self._events is None:
+            return []
+        return sorted((event for event in self._events if event is not None), key=lambda event: event[3])
+
+    def to_chrome(self):
+        """Dicionário no formato Chrome trace-event (tempos em microssegundos)."""
+        pid = os.getpid()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        trace = []
+        threads = set()
+        for phase, name, category, start, duration, tid, args in self.events():
+            event = {"name": name, "cat": category, "ph": phase, "ts": start / 1000,
+                     "pid": pid, "tid": tid}
+            if phase == "X":
+                event["dur"] = duration / 1000
+            else:
+                event["s"] = "t"
+            if args:
+                event["args"] = args
+            trace.append(event)
+            threads.add(tid)
+        for tid in threads:
+            trace.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                          "args": {"name": names.get(tid, f"thread {tid}")}})
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+    def save(self, path):
+        """Grava o rastro em JSON (Perfetto / chrome://tracing)."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome(), f, ensure_ascii=False)
+
+    def summary(self):
+        """
+        Tempo total (s) dos eventos com duração, por categoria, mais CAT_EMULATION:
+        o tempo das instruções menos o Tk e as pausas aninhados nelas. Assim
+        emulação, Tk e pausas não contam o mesmo intervalo duas vezes.
+        """
+        totals = {}
+        instructions = {}   # thread -> [(início, fim)] das instruções, em ordem
+        events = [event for event in self.events() if event[0] == "X"]
+        for _, _, category, start, duration, tid, _ in events:
+            totals[category] = totals.get(category, 0.0) + duration / 1e9
+            if category == CAT_INSTRUCTION:
+                instructions.setdefault(tid, []).append((start, start + duration))
+        nested = 0
+        for _, _, category, start, duration, tid, _ in events:
+            spans = instructions.get(tid)
+            if category in (CAT_TK, CAT_SLEEP) and spans:
+                k = bisect.bisect_right(spans, (start, float("inf"))) - 1
+                if k >= 0 and start + duration <= spans[k][1]:
+                    nested += duration
+        totals[CAT_EMULATION] = totals.get(CAT_INSTRUCTION, 0.0) - nested / 1e9
+        return totals
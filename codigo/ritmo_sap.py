@@ -0,0 +1,134 @@
+"""
+Orçamento de quadros da animação do SAP-1.
+
+As pausas da animação formam a linha do tempo pedida pelo controle de
+velocidade do clock. O FrameBudget dorme até o próximo prazo dessa linha do
+tempo (e não pelo tempo pedido), então o custo real de desenhar cada estado T
+é descontado da pausa. O tempo gasto fora das pausas é medido a cada estado
+T; quando o desenho não cabe mais no orçamento, a animação perde detalhes em
+vez de atrasar o clock:
+
+    completa -> só destaque das pontas -> só valores dos registradores
+
+e volta a subir quando sobra folga por vários estados seguidos. Esperas fora
+da animação (IN aguardando dados, diálogos modais) ficam dentro de waiting()
+e não contam como desenho.
+"""
+
+import time
+from contextlib import contextmanager
+
+QUALITY_VALUES = 0   # só atualiza os valores dos registradores
+QUALITY_FLASH = 1    # acende apenas a origem e o destino de cada transferência
+QUALITY_FULL = 2     # caminho completo pelo barramento
+
+QUALITY_NAMES = {
+    QUALITY_FULL: "completa",
+    QUALITY_FLASH: "só destaques",
+    QUALITY_VALUES: "só valores",
+}
+
+# Fração do orçamento de um estado T que o desenho pode ocupar.
+HIGH_LOAD = 0.8
+LOW_LOAD = 0.3
+# Atraso tolerado (fração do orçamento do estado T) e estados atrasados seguidos
+# antes de baixar o nível: um quadro lento isolado não muda a qualidade.
+LATE_TOLERANCE = 0.25
+LATE_STATES = 3
+# Estados T com folga antes de tentar subir de nível (dobra a cada nova queda).
+CALM_STATES = 20
+MAX_CALM_STATES = 640
+SMOOTHING = 0.3
+
+
+class FrameBudget:
+    """Controla o ritmo das pausas e o nível de qualidade da animação."""
+
+    def __init__(self, adaptive=True, on_change=None, clock=time.perf_counter, sleep=time.sleep):
+        self.adaptive = adaptive
+        self.on_change = on_change
+        self.quality = QUALITY_FULL
+        self.load = 0.0             # média móvel de (tempo de desenho / orçamento) por estado T
+        self._clock = clock
+        self._sleep = sleep
+        self._deadline = None
+        self._wake = None           # fim da última pausa
+        self._work = 0.0            # tempo fora das pausas no estado T atual
+        self._budget = 0.0          # pausas pedidas no estado T atual
+        self._late = 0.0            # maior atraso em relação ao prazo no estado T atual
+        self._calm = 0
+        self._calm_needed = CALM_STATES
+        self._late_states = 0       # estados T seguidos com atraso acima da tolerância
+
+    def start(self):
+        """Recomeça a linha do tempo (início de um passo ou de uma execução)."""
+        now = self._clock()
+        self._deadline = self._wake = now
+        self._work = self._budget = self._late = 0.0
+
+    def sleep(self, seconds):
+        """Pausa até o prazo da linha do tempo, descontando o tempo já gasto desenhando."""
+        now = self._clock()
+        if self._deadline is None:
+            self._deadline = self._wake = now
+        self._work += now - self._wake
+        self._budget += seconds
+        self._deadline += seconds
+        if self._deadline > now:
+            self._sleep(self._deadline - now)
+        else:
+            self._late = max(self._late, now - self._deadline)
+        self._wake = self._clock()
+
+    @contextmanager
+    def waiting(self):
+        """
+        Espera bloqueante fora da animação: o tempo não conta como desenho e a
+        linha do tempo anda junto, sem gerar atraso.
+        """
+        start = self._clock()
+        try:
+            yield
+        finally:
+            if self._deadline is not None:
+                elapsed = self._clock() - start
+                self._wake += elapsed
+                self._deadline += elapsed
+
+    def end_state(self):
+        """Fecha a medição de um estado T e ajusta o nível de qualidade."""
+        if self._deadline is None or self._budget <= 0:
+            return
+        now = self._clock()
+        work = self._work + (now - self._wake)
+        late = self._late > LATE_TOLERANCE * self._budget
+        self.load += SMOOTHING * (work / self._budget - self.load)
+        self._work = self._budget = self._late = 0.0
+        self._wake = now
+        if not self.adaptive:
+            return
+
+        if late:
+            # Descarta o atraso em vez de tentar recuperá-lo às pressas.
+            self._deadline = now
+        self._late_states = self._late_states + 1 if late else 0
+        if self._late_states >= LATE_STATES or self.load > HIGH_LOAD:
+            self._deadline = now
+            self._late_states = 0
+            self._calm = 0
+            if self.quality > QUALITY_VALUES:
+                self._calm_needed = min(self._calm_needed * 2, MAX_CALM_STATES)
+                self._set_quality(self.quality - 1)
+        elif self.load < LOW_LOAD and self.quality < QUALITY_FULL:
+            self._calm += 1
+            if self._calm >= self._calm_needed:
+                self._calm = 0
+                self._set_quality(self.quality + 1)
+        else:
+            self._calm = 0
+
+    def _set_quality(self, quality):
+        self.quality = quality
+        self.load = 0.0
+        if self.on_change:
+            self.on_change(quality)